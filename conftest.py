@@ -0,0 +1,10 @@
+import pytest
+
+
+@pytest.fixture(autouse=True, scope='session')
+def isolated_caches():
+    """Тесты не трогают рабочий cache.sqlite3 (как TEST_RUNNER проекта)."""
+    from core.testing import isolated_caches
+
+    with isolated_caches():
+        yield
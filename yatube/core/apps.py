@@ -3,3 +3,11 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from . import db, profiling
+
+        connection_created.connect(db.configure_sqlite)
+        profiling.instrument_templates()
@@ -0,0 +1,68 @@
+"""Версионированные ключи кэша.
+
+У каждой области (scope) кэша есть номер версии, который входит в ключи
+закэшированных страниц. Запись в базу поднимает версию, и все старые
+ключи области разом становятся недостижимыми — без ``cache.clear()``
+и без ожидания истечения TTL.
+"""
+import time
+from functools import wraps
+from typing import Callable, Sequence, Union
+
+from django.core.cache import cache
+from django.views.decorators.cache import cache_page
+
+VERSION_KEY: str = 'version:{scope}'
+
+
+def _initial_version() -> int:
+    # Версия от времени, а не с единицы: если ключ версии вытеснят из кэша,
+    # новая версия не совпадёт ни с одной из уже использованных.
+    return int(time.time() * 1000)
+
+
+def get_version(scope: str) -> int:
+    key = VERSION_KEY.format(scope=scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(*scopes: str) -> None:
+    for scope in scopes:
+        key = VERSION_KEY.format(scope=scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial_version(), None)
+
+
+def versioned_cache_page(
+    timeout: int, scope: Union[str, Sequence[str], Callable]
+):
+    """Аналог ``cache_page``, ключи которого зависят от версии области.
+
+    Если область зависит от объекта страницы, ``scope`` — функция
+    с сигнатурой view, возвращающая имя области. Страница может
+    зависеть от нескольких областей — тогда это последовательность имён,
+    и подъём любой из них сбрасывает кэш.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            names = (
+                scope(request, *args, **kwargs) if callable(scope) else scope
+            )
+            if isinstance(names, str):
+                names = (names,)
+            key_prefix = ':'.join(
+                f'{name}:{get_version(name)}' for name in names
+            )
+            cached_view = cache_page(timeout, key_prefix=key_prefix)(
+                view_func
+            )
+            return cached_view(request, *args, **kwargs)
+        return wrapper
+    return decorator
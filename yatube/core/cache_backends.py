@@ -0,0 +1,327 @@
+"""Бэкенды кэша для нескольких процессов на одном сервере.
+
+``LocMemCache`` у каждого воркера gunicorn свой: попадания делятся
+на число воркеров, а поднятая версия области (см. ``core.cache``)
+не доходит до соседей. Здесь два бэкенда без внешних сервисов:
+
+* ``SQLiteCache`` — общий кэш в отдельном файле SQLite (WAL), видимый
+  всем процессам хоста; ``incr`` атомарен между процессами;
+* ``TwoTierCache`` — локальная память процесса (L1) с коротким TTL
+  поверх любого общего кэша (L2). Чтения обслуживает L1, а изменения
+  от других процессов становятся видны не позже чем через ``L1_TIMEOUT``.
+"""
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from . import profiling
+
+# Раз во сколько записей процесс чистит просроченные ключи.
+CULL_EVERY: int = 100
+
+
+class SQLiteCache(BaseCache):
+    """Кэш в файле SQLite, путь к которому задаётся в ``LOCATION``.
+
+    Файл отделён от основной базы: запись в кэш не ждёт транзакций
+    приложения и не попадает в них.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.path = location
+        self._local = threading.local()
+        self._writes = 0
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(
+                self.path, timeout=30, isolation_level=None,
+                check_same_thread=False,
+            )
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)'
+            )
+            self._local.db = db
+        return db
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE берёт блокировку записи сразу, до чтения:
+        # два процесса не могут прочитать одно и то же значение для incr.
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            yield db
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+
+    def _expiry(self, timeout):
+        # Абсолютное время истечения (unix time) или None — навсегда.
+        return self.get_backend_timeout(timeout)
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _alive(self) -> str:
+        return '(expires IS NULL OR expires > ?)'
+
+    def get(self, key, default=None, version=None):
+        row = self._db.execute(
+            f'SELECT value FROM cache WHERE key = ? AND {self._alive()}',
+            (self._key(key, version), time.time()),
+        ).fetchone()
+        return default if row is None else pickle.loads(row[0])
+
+    def get_many(self, keys, version=None):
+        keys = {self._key(key, version): key for key in keys}
+        if not keys:
+            return {}
+        marks = ', '.join('?' * len(keys))
+        rows = self._db.execute(
+            f'SELECT key, value FROM cache '
+            f'WHERE key IN ({marks}) AND {self._alive()}',
+            (*keys, time.time()),
+        )
+        return {keys[key]: pickle.loads(value) for key, value in rows}
+
+    def _write(self, key, value, timeout, version, replace: bool) -> bool:
+        key = self._key(key, version)
+        row = (
+            key,
+            pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+            self._expiry(timeout),
+        )
+        with self._transaction() as db:
+            if replace:
+                db.execute(
+                    'INSERT OR REPLACE INTO cache (key, value, expires) '
+                    'VALUES (?, ?, ?)',
+                    row,
+                )
+            else:
+                db.execute(
+                    'DELETE FROM cache WHERE key = ? AND expires <= ?',
+                    (key, time.time()),
+                )
+                added = db.execute(
+                    'INSERT OR IGNORE INTO cache (key, value, expires) '
+                    'VALUES (?, ?, ?)',
+                    row,
+                ).rowcount
+                if not added:
+                    return False
+        self._writes += 1
+        if self._writes % CULL_EVERY == 0:
+            self._cull()
+        return True
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._write(key, value, timeout, version, replace=True)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._write(key, value, timeout, version, replace=False)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self._expiry(timeout)
+        rows = [
+            (self._key(key, version),
+             pickle.dumps(value, pickle.HIGHEST_PROTOCOL), expires)
+            for key, value in data.items()
+        ]
+        with self._transaction() as db:
+            db.executemany(
+                'INSERT OR REPLACE INTO cache (key, value, expires) '
+                'VALUES (?, ?, ?)',
+                rows,
+            )
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        updated = self._db.execute(
+            f'UPDATE cache SET expires = ? WHERE key = ? AND {self._alive()}',
+            (self._expiry(timeout), self._key(key, version), time.time()),
+        ).rowcount
+        return bool(updated)
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        with self._transaction() as db:
+            row = db.execute(
+                f'SELECT value FROM cache WHERE key = ? AND {self._alive()}',
+                (key, time.time()),
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            db.execute(
+                'UPDATE cache SET value = ? WHERE key = ?',
+                (pickle.dumps(value, pickle.HIGHEST_PROTOCOL), key),
+            )
+        return value
+
+    def has_key(self, key, version=None):
+        return self._db.execute(
+            f'SELECT 1 FROM cache WHERE key = ? AND {self._alive()}',
+            (self._key(key, version), time.time()),
+        ).fetchone() is not None
+
+    def delete(self, key, version=None):
+        self._db.execute(
+            'DELETE FROM cache WHERE key = ?', (self._key(key, version),)
+        )
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        if keys:
+            marks = ', '.join('?' * len(keys))
+            self._db.execute(f'DELETE FROM cache WHERE key IN ({marks})', keys)
+
+    def clear(self):
+        self._db.execute('DELETE FROM cache')
+
+    def _cull(self) -> None:
+        """Удаляет просроченное, а при переполнении — и живые ключи.
+
+        Сначала уходят ключи, ближайшие к сроку, затем — бессрочные
+        в порядке записи. Среди бессрочных — ключи версий областей:
+        ``core.cache`` переживает их потерю, начиная новую версию.
+        """
+        with self._transaction() as db:
+            db.execute('DELETE FROM cache WHERE expires <= ?', (time.time(),))
+            count = db.execute('SELECT count(*) FROM cache').fetchone()[0]
+            if count <= self._max_entries:
+                return
+            excess = count // self._cull_frequency
+            excess -= db.execute(
+                'DELETE FROM cache WHERE key IN ('
+                'SELECT key FROM cache WHERE expires IS NOT NULL '
+                'ORDER BY expires LIMIT ?)',
+                (excess,),
+            ).rowcount
+            if excess > 0:
+                # INSERT OR REPLACE выдаёт строке новый rowid, поэтому
+                # меньший rowid — давно не перезаписанный ключ.
+                db.execute(
+                    'DELETE FROM cache WHERE key IN ('
+                    'SELECT key FROM cache WHERE expires IS NULL '
+                    'ORDER BY rowid LIMIT ?)',
+                    (excess,),
+                )
+
+
+class TwoTierCache(BaseCache):
+    """Локальный кэш процесса поверх общего.
+
+    ``LOCATION`` — алиас общего кэша из ``CACHES``. ``OPTIONS['L1_TIMEOUT']``
+    — сколько секунд значение живёт в памяти процесса. Ключи в оба уровня
+    передаются как есть: префиксы и версии ключей задаёт общий кэш.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.l1_timeout = options.get('L1_TIMEOUT', 5)
+        self.l2_alias = location
+        # Одно имя на процесс: потоки делят общий L1, как в LocMemCache.
+        self.l1 = LocMemCache(f'two-tier:{location}', {
+            'TIMEOUT': self.l1_timeout,
+            'OPTIONS': {
+                'MAX_ENTRIES': options.get('L1_MAX_ENTRIES', 1000),
+            },
+        })
+
+    @property
+    def l2(self) -> BaseCache:
+        return caches[self.l2_alias]
+
+    def _l1_timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT or timeout is None:
+            return self.l1_timeout
+        return min(timeout, self.l1_timeout)
+
+    def get(self, key, default=None, version=None):
+        sentinel = object()
+        value = self.l1.get(key, sentinel, version=version)
+        if value is not sentinel:
+            profiling.record_cache('l1_hit')
+            return value
+        value = self.l2.get(key, sentinel, version=version)
+        if value is sentinel:
+            profiling.record_cache('miss')
+            return default
+        profiling.record_cache('l2_hit')
+        self.l1.set(key, value, version=version)
+        return value
+
+    def get_many(self, keys, version=None):
+        found = self.l1.get_many(keys, version=version)
+        profiling.record_cache('l1_hit', len(found))
+        missing = [key for key in keys if key not in found]
+        if missing:
+            fetched = self.l2.get_many(missing, version=version)
+            profiling.record_cache('l2_hit', len(fetched))
+            profiling.record_cache('miss', len(missing) - len(fetched))
+            self.l1.set_many(fetched, version=version)
+            found.update(fetched)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.l2.set(key, value, timeout, version=version)
+        self.l1.set(key, value, self._l1_timeout(timeout), version=version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.l2.add(key, value, timeout, version=version)
+        self.l1.delete(key, version=version)
+        return added
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.l2.set_many(data, timeout, version=version)
+        self.l1.set_many(
+            {key: value for key, value in data.items() if key not in failed},
+            self._l1_timeout(timeout), version=version,
+        )
+        return failed
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.l2.touch(key, timeout, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self.l1.delete(key, version=version)
+        return self.l2.incr(key, delta, version=version)
+
+    def has_key(self, key, version=None):
+        return (
+            self.l1.has_key(key, version=version)
+            or self.l2.has_key(key, version=version)
+        )
+
+    def delete(self, key, version=None):
+        self.l1.delete(key, version=version)
+        self.l2.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        self.l1.delete_many(keys, version=version)
+        self.l2.delete_many(keys, version=version)
+
+    def clear(self):
+        self.l1.clear()
+        self.l2.clear()
+
+    def close(self, **kwargs):
+        self.l2.close(**kwargs)
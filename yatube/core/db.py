@@ -0,0 +1,77 @@
+"""Настройка соединений SQLite для работы под нагрузкой.
+
+По умолчанию SQLite пишет в режиме rollback journal: пока транзакция
+``post_create`` или ``add_comment`` пишет, читатели ждут. В режиме WAL
+читатели видят последний зафиксированный снимок и писателю не мешают,
+а ``synchronous=NORMAL`` в WAL безопасен для целостности и не делает
+fsync на каждый коммит. ``configure_sqlite`` подключается к сигналу
+``connection_created`` в ``CoreConfig.ready``; постоянные соединения
+(``CONN_MAX_AGE``) задаются в ``settings.DATABASES``.
+"""
+import sqlite3
+from typing import List, Sequence, Tuple
+
+from django.db import transaction
+from django.db.models import Max
+
+PRAGMAS: Sequence[Tuple[str, object]] = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    # Сколько миллисекунд ждать чужую блокировку записи, прежде чем
+    # вернуть «database is locked».
+    ('busy_timeout', 5000),
+    # Отрицательное значение — размер страничного кэша в КиБ.
+    ('cache_size', -20000),
+    ('mmap_size', 256 * 1024 * 1024),
+    ('temp_store', 'MEMORY'),
+)
+
+
+def apply_pragmas(cursor, pragmas: Sequence[Tuple[str, object]] = PRAGMAS):
+    for name, value in pragmas:
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def configure_sqlite(sender, connection, **kwargs) -> None:
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor)
+
+
+def copy_sqlite(source_path: str, target_path: str) -> None:
+    """Копирует файл базы через backup API, не останавливая читателей.
+
+    Копия делается одним шагом (``pages=-1``): читатели целевой базы
+    видят либо прежнее содержимое, либо новое, но не смесь.
+    """
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(target_path, timeout=30)
+    try:
+        source.backup(target, pages=-1)
+    finally:
+        target.close()
+        source.close()
+
+
+def bulk_insert(model, objects: List) -> List:
+    """``bulk_create``, после которого у объектов проставлены ``pk``.
+
+    PostgreSQL возвращает ``pk`` из ``bulk_create`` сам, SQLite — нет.
+    Но в SQLite пишущая транзакция держит блокировку записи до коммита,
+    поэтому строки одного вызова получают ``pk`` подряд до текущего
+    максимума. Отсюда требование вызывать функцию в транзакции.
+    """
+    if not transaction.get_connection().in_atomic_block:
+        raise transaction.TransactionManagementError(
+            'bulk_insert вызывается только внутри transaction.atomic'
+        )
+    if not objects:
+        return objects
+    model.objects.bulk_create(objects)
+    if objects[0].pk is None:
+        last = model.objects.aggregate(pk=Max('pk'))['pk']
+        pks = range(last - len(objects) + 1, last + 1)
+        for pk, obj in zip(pks, objects):
+            obj.pk = pk
+    return objects
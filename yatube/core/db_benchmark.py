@@ -0,0 +1,133 @@
+"""Читатели против писателей в SQLite: rollback journal и WAL.
+
+Нагрузка повторяет ленту: читатели листают страницы по дате, писатели
+добавляют пост и обновляют счётчик в одной транзакции. База — отдельный
+временный файл, Django и рабочая база не участвуют. Для каждого режима
+меряются пропускная способность, p95 задержки чтения и записи и число
+ошибок «database is locked».
+"""
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Sequence, Tuple
+
+from .db import PRAGMAS
+from .stats import percentile
+
+MODES: Dict[str, Sequence[Tuple[str, object]]] = {
+    'rollback': (('journal_mode', 'DELETE'), ('busy_timeout', 5000)),
+    'wal': PRAGMAS,
+}
+ROWS: int = 20000
+PAGE: int = 10
+
+
+def _connect(path: str, pragmas) -> sqlite3.Connection:
+    db = sqlite3.connect(
+        path, isolation_level=None, check_same_thread=False
+    )
+    for name, value in pragmas:
+        db.execute(f'PRAGMA {name} = {value}')
+    return db
+
+
+def _prepare(path: str, pragmas) -> None:
+    db = _connect(path, pragmas)
+    db.execute(
+        'CREATE TABLE post (id INTEGER PRIMARY KEY, author INTEGER, '
+        'text TEXT, created REAL)'
+    )
+    db.execute('CREATE INDEX post_created ON post (created)')
+    db.execute('CREATE TABLE stats (author INTEGER PRIMARY KEY, posts INT)')
+    rnd = random.Random(0)
+    db.execute('BEGIN')
+    db.executemany(
+        'INSERT INTO post (author, text, created) VALUES (?, ?, ?)',
+        ((rnd.randrange(100), 'x' * 300, number) for number in range(ROWS)),
+    )
+    db.executemany(
+        'INSERT INTO stats VALUES (?, 0)',
+        ((author,) for author in range(100)),
+    )
+    db.execute('COMMIT')
+    db.close()
+
+
+def _worker(path, pragmas, deadline, write: bool, seed: int) -> tuple:
+    db = _connect(path, pragmas)
+    rnd = random.Random(seed)
+    latencies, errors = [], 0
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            if write:
+                author = rnd.randrange(100)
+                db.execute('BEGIN IMMEDIATE')
+                db.execute(
+                    'INSERT INTO post (author, text, created) '
+                    'VALUES (?, ?, ?)', (author, 'x' * 300, time.time()),
+                )
+                db.execute(
+                    'UPDATE stats SET posts = posts + 1 WHERE author = ?',
+                    (author,),
+                )
+                db.execute('COMMIT')
+            else:
+                db.execute(
+                    'SELECT id, author, text FROM post '
+                    'ORDER BY created DESC LIMIT ? OFFSET ?',
+                    (PAGE, rnd.randrange(ROWS // PAGE) * PAGE),
+                ).fetchall()
+                db.execute('SELECT count(*) FROM post').fetchone()
+        except sqlite3.OperationalError:
+            errors += 1
+            if db.in_transaction:
+                db.execute('ROLLBACK')
+            continue
+        latencies.append((time.perf_counter() - started) * 1000)
+    db.close()
+    return write, latencies, errors
+
+
+def run_mode(
+    pragmas, readers: int, writers: int, duration: float
+) -> Dict[str, float]:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'benchmark.sqlite3')
+        _prepare(path, pragmas)
+        deadline = time.monotonic() + duration
+        with ThreadPoolExecutor(max_workers=readers + writers) as pool:
+            futures = [
+                pool.submit(
+                    _worker, path, pragmas, deadline, number < writers, number
+                )
+                for number in range(readers + writers)
+            ]
+            results = [future.result() for future in futures]
+    reads, writes = [], []
+    for write, latencies, _ in results:
+        (writes if write else reads).extend(latencies)
+    return {
+        'reads_per_s': round(len(reads) / duration, 1),
+        'writes_per_s': round(len(writes) / duration, 1),
+        'read_p95_ms': round(percentile(reads, 0.95), 2),
+        'write_p95_ms': round(percentile(writes, 0.95), 2),
+        'locked_errors': sum(errors for _, _, errors in results),
+    }
+
+
+def run(
+    readers: int = 8,
+    writers: int = 2,
+    duration: float = 5,
+    modes: Sequence[str] = tuple(MODES),
+) -> Dict[str, Dict[str, float]]:
+    # Потоки sqlite3 отпускают GIL на время работы SQLite, поэтому
+    # блокировки файла видны так же, как между воркерами gunicorn.
+    return {
+        mode: run_mode(MODES[mode], readers, writers, duration)
+        for mode in modes
+    }
@@ -0,0 +1,49 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core import db_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает SQLite в режимах rollback journal и WAL с настройками '
+        'core.db: читатели листают ленту, пока писатели добавляют посты. '
+        'Работает на временном файле, рабочая база не меняется.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument(
+            '--duration', type=float, default=5,
+            help='Секунд на каждый режим.',
+        )
+        parser.add_argument(
+            '--modes', nargs='+', choices=db_benchmark.MODES,
+            default=list(db_benchmark.MODES),
+        )
+        parser.add_argument('--output', help='Куда записать JSON-отчёт.')
+
+    def handle(self, *args, **options):
+        report = db_benchmark.run(
+            readers=options['readers'],
+            writers=options['writers'],
+            duration=options['duration'],
+            modes=options['modes'],
+        )
+        for mode, result in report.items():
+            self.stdout.write(
+                f'  {mode:<9} чтений/с {result["reads_per_s"]:>9.1f}  '
+                f'p95 {result["read_p95_ms"]:>8.2f} мс   '
+                f'записей/с {result["writes_per_s"]:>8.1f}  '
+                f'p95 {result["write_p95_ms"]:>8.2f} мс   '
+                f'locked {result["locked_errors"]}'
+            )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, indent=2)
+                output.write('\n')
+            self.stdout.write(
+                self.style.SUCCESS(f'Отчёт записан в {options["output"]}')
+            )
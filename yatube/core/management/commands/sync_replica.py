@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core import db
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в файл реплики через backup API: '
+        'читатели реплики видят либо старую, либо новую копию целиком.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--replica', default='replica')
+        parser.add_argument(
+            '--interval', type=float,
+            help='Повторять каждые N секунд, пока команду не остановят.',
+        )
+
+    def handle(self, *args, **options):
+        source = connections['default'].settings_dict
+        target = connections[options['replica']].settings_dict
+        if not all('sqlite3' in alias['ENGINE'] for alias in (source, target)):
+            raise CommandError('sync_replica умеет только SQLite → SQLite')
+        while True:
+            started = time.perf_counter()
+            db.copy_sqlite(source['NAME'], target['NAME'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Реплика {options["replica"]} обновлена за '
+                f'{time.perf_counter() - started:.2f} с'
+            ))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,96 @@
+"""Middleware проекта."""
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import profiling, routers
+
+PIN_COOKIE: str = 'primary_db'
+SAFE_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+
+class ProfilingMiddleware:
+    """Профилирует выбранные запросы и пишет профиль в лог.
+
+    Запрос профилируется, если его выпала доля ``PROFILING_SAMPLE_RATE``
+    или сотрудник прислал заголовок ``PROFILING_HEADER``. Ответу
+    профилированного запроса добавляется ``Server-Timing``, который
+    видно во вкладке Network браузера.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.header = 'HTTP_' + settings.PROFILING_HEADER.upper().replace(
+            '-', '_'
+        )
+
+    def _wanted(self, request) -> bool:
+        if random.random() < settings.PROFILING_SAMPLE_RATE:
+            return True
+        # Заголовок от кого угодно позволил бы нагрузить сервер
+        # профилированием, поэтому он работает только для сотрудников.
+        return self.header in request.META and request.user.is_staff
+
+    def __call__(self, request):
+        if not self._wanted(request):
+            return self.get_response(request)
+
+        profile = profiling.Profile()
+        with ExitStack() as stack:
+            stack.enter_context(profiling.activate(profile))
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(profile.execute)
+                )
+            response = self.get_response(request)
+
+        data = profile.as_dict()
+        match = request.resolver_match
+        profiling.write({
+            'time': time.time(),
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            **data,
+        })
+        response['Server-Timing'] = ', '.join(
+            [f'total;dur={data["total_ms"]}',
+             f'db;dur={data["db"]["ms"]};desc="{data["db"]["queries"]} SQL"',
+             f'templates;dur={data["templates"]["ms"]}']
+            + [f'{name};dur={ms}' for name, ms in data['sections'].items()]
+        )
+        return response
+
+
+class ReplicaPinMiddleware:
+    """Read-your-writes для ``core.routers.ReplicaRouter``.
+
+    Не-GET запрос целиком читает из основной базы. Если запрос записал
+    данные сайта (запись сессии не в счёт), ответ ставит куку, и
+    следующие ``REPLICA_PIN_SECONDS`` секунд этот клиент тоже читает из
+    основной базы, пока реплика не догонит её. Кука, а не сессия:
+    чтение сессии само было бы запросом к базе.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned = (
+            request.method not in SAFE_METHODS
+            or PIN_COOKIE in request.COOKIES
+        )
+        with routers.pin(pinned) as state:
+            response = self.get_response(request)
+        if state.wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
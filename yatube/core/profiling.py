@@ -0,0 +1,241 @@
+"""Профиль одного запроса: SQL, шаблоны, кэш и прочие участки.
+
+Профиль собирается только для запросов, выбранных
+``core.middleware.ProfilingMiddleware``; для остальных каждая точка
+замера обходится одним чтением ``ContextVar``. Точки замера:
+
+* SQL — ``execute_wrapper`` каждого соединения на время запроса;
+* шаблоны — обёртка ``Template.render`` (включая ``{% include %}``);
+* кэш — ``record_cache`` из ``core.cache_backends.TwoTierCache``;
+* произвольные участки — контекстный менеджер ``section(name)``,
+  например работа с миниатюрами в ``posts.thumbnails``.
+
+Готовые профили пишутся строками JSON в ротируемый лог
+``PROFILING_LOG``; ``summarize`` сводит их по ``view_name``.
+"""
+import json
+import logging
+import os
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+from typing import Dict, Iterator, List, Optional
+
+from django.conf import settings
+from django.template.base import Template
+
+from .stats import percentile
+
+# Сколько самых частых повторов SQL сохранять в профиле.
+TOP_DUPLICATES: int = 5
+
+_current: ContextVar[Optional['Profile']] = ContextVar(
+    'profile', default=None
+)
+_handler: Optional[RotatingFileHandler] = None
+
+
+class Profile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries: List[tuple] = []
+        self.db_seconds = 0.0
+        self.templates: Dict[str, List[float]] = defaultdict(list)
+        self.templates_seconds = 0.0
+        self._template_depth = 0
+        self.cache = Counter()
+        self.sections: Dict[str, float] = defaultdict(float)
+
+    def execute(self, execute, sql, params, many, context):
+        """``execute_wrapper`` соединения: время и текст каждого запроса."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - started
+            self.queries.append((sql, repr(params)))
+
+    @contextmanager
+    def template(self, name: str) -> Iterator[None]:
+        # Время вложенных шаблонов входит в родительский: в итог
+        # идёт только внешний уровень, по имени — включительное время.
+        self._template_depth += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self._template_depth -= 1
+            self.templates[name or '<string>'].append(elapsed)
+            if not self._template_depth:
+                self.templates_seconds += elapsed
+
+    def as_dict(self) -> dict:
+        statements = Counter(self.queries)
+        duplicates = [
+            {'sql': sql, 'count': count}
+            for (sql, _), count in statements.most_common(TOP_DUPLICATES)
+            if count > 1
+        ]
+        return {
+            'total_ms': _ms(time.perf_counter() - self.started),
+            'db': {
+                'queries': len(self.queries),
+                'ms': _ms(self.db_seconds),
+                'duplicates': duplicates,
+            },
+            'templates': {
+                'ms': _ms(self.templates_seconds),
+                'renders': {
+                    name: {'count': len(times), 'ms': _ms(sum(times))}
+                    for name, times in self.templates.items()
+                },
+            },
+            'cache': dict(self.cache),
+            'sections': {
+                name: _ms(seconds) for name, seconds in self.sections.items()
+            },
+        }
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 2)
+
+
+def current() -> Optional[Profile]:
+    return _current.get()
+
+
+@contextmanager
+def activate(profile: Profile) -> Iterator[Profile]:
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+
+
+def record_cache(event: str, count: int = 1) -> None:
+    """Отмечает событие кэша: ``l1_hit``, ``l2_hit`` или ``miss``."""
+    profile = _current.get()
+    if profile is not None and count:
+        profile.cache[event] += count
+
+
+@contextmanager
+def section(name: str) -> Iterator[None]:
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.sections[name] += time.perf_counter() - started
+
+
+_original_render = Template.render
+
+
+def _render(self, context):
+    profile = _current.get()
+    if profile is None:
+        return _original_render(self, context)
+    with profile.template(self.name):
+        return _original_render(self, context)
+
+
+def instrument_templates() -> None:
+    """Подменяет ``Template.render``; вызывается из ``CoreConfig.ready``."""
+    Template.render = _render
+
+
+def _get_logger() -> logging.Logger:
+    global _handler
+    logger = logging.getLogger('yatube.profile')
+    path = os.path.abspath(settings.PROFILING_LOG)
+    # Обработчик пересоздаётся, если путь к логу поменяли настройки.
+    if _handler is None or _handler.baseFilename != path:
+        if _handler is not None:
+            logger.removeHandler(_handler)
+            _handler.close()
+        _handler = RotatingFileHandler(
+            path,
+            maxBytes=settings.PROFILING_LOG_BYTES,
+            backupCount=settings.PROFILING_LOG_BACKUPS,
+            encoding='utf-8',
+        )
+        _handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(_handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+def write(record: dict) -> None:
+    _get_logger().info(json.dumps(record, ensure_ascii=False))
+
+
+def read_records() -> Iterator[dict]:
+    """Профили из лога, включая ротированные файлы."""
+    paths = [settings.PROFILING_LOG] + [
+        f'{settings.PROFILING_LOG}.{number}'
+        for number in range(1, settings.PROFILING_LOG_BACKUPS + 1)
+    ]
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding='utf-8') as log:
+            for line in log:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def _average(values: List[float]) -> float:
+    return round(sum(values) / len(values), 2) if values else 0
+
+
+def summarize(records: Iterator[dict]) -> List[dict]:
+    """Средние по ``view_name``; самые медленные представления сверху."""
+    by_view = defaultdict(list)
+    for record in records:
+        by_view[record.get('view') or '-'].append(record)
+    rows = []
+    for view, group in by_view.items():
+        cache = Counter()
+        sections = defaultdict(list)
+        duplicates = Counter()
+        for record in group:
+            cache.update(record['cache'])
+            for name, ms in record['sections'].items():
+                sections[name].append(ms)
+            for duplicate in record['db']['duplicates']:
+                duplicates[duplicate['sql']] += duplicate['count']
+        lookups = sum(cache.values())
+        rows.append({
+            'view': view,
+            'requests': len(group),
+            'avg_ms': _average([record['total_ms'] for record in group]),
+            'p95_ms': percentile(
+                [record['total_ms'] for record in group], 0.95
+            ),
+            'queries': _average([record['db']['queries'] for record in group]),
+            'db_ms': _average([record['db']['ms'] for record in group]),
+            'templates_ms': _average(
+                [record['templates']['ms'] for record in group]
+            ),
+            'cache_hit_rate': round(
+                (lookups - cache['miss']) / lookups, 2
+            ) if lookups else None,
+            'sections': {
+                name: round(sum(values) / len(group), 2)
+                for name, values in sections.items()
+            },
+            'duplicates': duplicates.most_common(TOP_DUPLICATES),
+        })
+    return sorted(rows, key=lambda row: row['avg_ms'], reverse=True)
@@ -0,0 +1,82 @@
+"""Чтение с реплик, запись — в основную базу.
+
+Реплики перечислены в ``settings.DATABASE_REPLICAS``; пока список пуст,
+всё идёт в ``default``. С реплик читает только код внутри ``pin()`` —
+его открывает ``core.middleware.ReplicaPinMiddleware`` на время запроса.
+Команды, воркеры и shell читают из основной базы: они сразу читают то,
+что только что записали. Чтобы пользователь видел свои изменения,
+чтения идут в основную базу и внутри ``pin()``:
+
+* в запросе, который записал данные сайта, и в любом не-GET запросе;
+* внутри транзакции — реплика не видит её незакоммиченных данных;
+* в течение ``REPLICA_PIN_SECONDS`` после такого запроса — об этом
+  помнит кука, которую ставит ``ReplicaPinMiddleware``.
+
+Сессии, хранилище миниатюр и очередь задач читаются только из
+основной базы: их пишут и сразу читают другие процессы и потоки.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from django.conf import settings
+from django.db import connections
+
+PRIMARY: str = 'default'
+PRIMARY_ONLY_APPS = frozenset({'sessions', 'thumbnail', 'jobs'})
+
+
+class Pin:
+    """Состояние одного запроса: читать ли из основной базы."""
+
+    def __init__(self, pinned: bool = False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+_pin: ContextVar[Optional[Pin]] = ContextVar('replica_pin', default=None)
+
+
+@contextmanager
+def pin(pinned: bool = False) -> Iterator[Pin]:
+    state = Pin(pinned)
+    token = _pin.set(state)
+    try:
+        yield state
+    finally:
+        _pin.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        state = _pin.get()
+        if (
+            not replicas
+            or state is None
+            or state.pinned
+            or state.wrote
+            or model._meta.app_label in PRIMARY_ONLY_APPS
+            or connections[PRIMARY].in_atomic_block
+        ):
+            return PRIMARY
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _pin.get()
+        # Служебные записи (продление сессии, кэш миниатюр, очередь
+        # задач) читаются только из основной базы — закреплять за ней
+        # клиента из-за них не нужно.
+        if state is not None and (
+            model._meta.app_label not in PRIMARY_ONLY_APPS
+        ):
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии основной базы, объекты из них совместимы.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
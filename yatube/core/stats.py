@@ -0,0 +1,25 @@
+"""Процентили задержек для бенчмарков, нагрузочного прогона и профиля."""
+import math
+from typing import Dict, Iterable, List
+
+
+def percentile(values: List[float], share: float) -> float:
+    """Процентиль по методу ближайшего ранга; у пустого списка — 0."""
+    if not values:
+        return 0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(share * len(ordered)))
+    return ordered[rank - 1]
+
+
+def latency_percentiles(
+    values: List[float],
+    shares: Iterable[float] = (0.5, 0.95, 0.99),
+    digits: int = 2,
+) -> Dict[str, float]:
+    """``{'p50_ms': ..., 'p95_ms': ...}`` для задержек в миллисекундах."""
+    ordered = sorted(values)
+    return {
+        f'p{round(share * 100)}_ms': round(percentile(ordered, share), digits)
+        for share in shares
+    }
@@ -0,0 +1,19 @@
+"""Окружение тестов: общий кэш в памяти вместо рабочего cache.sqlite3."""
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+def isolated_caches() -> override_settings:
+    return override_settings(CACHES=settings.TEST_CACHES)
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.caches = isolated_caches()
+        self.caches.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.caches.disable()
+        super().teardown_test_environment(**kwargs)
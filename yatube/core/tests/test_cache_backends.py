@@ -0,0 +1,137 @@
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from ..cache_backends import SQLiteCache
+
+TEMP_DIR = tempfile.mkdtemp()
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache_backends.TwoTierCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {'L1_TIMEOUT': 60},
+    },
+    'shared': {
+        'BACKEND': 'core.cache_backends.SQLiteCache',
+        'LOCATION': os.path.join(TEMP_DIR, 'cache.sqlite3'),
+    },
+}
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.temp_dir = tempfile.mkdtemp()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.temp_dir, ignore_errors=True)
+
+    def setUp(self):
+        self.cache = SQLiteCache(
+            os.path.join(self.temp_dir, 'cache.sqlite3'),
+            {'OPTIONS': {'MAX_ENTRIES': 50}},
+        )
+        self.cache.clear()
+
+    def test_basic_operations(self):
+        cache = self.cache
+        cache.set('key', {'a': 1})
+        self.assertEqual(cache.get('key'), {'a': 1})
+        self.assertFalse(cache.add('key', 'other'))
+        self.assertTrue(cache.add('new', 'value'))
+        cache.set_many({'x': 1, 'y': 2})
+        self.assertEqual(cache.get_many(['x', 'y', 'z']), {'x': 1, 'y': 2})
+        cache.delete_many(['x', 'y'])
+        self.assertIsNone(cache.get('x'))
+        self.assertEqual(cache.get('missing', 'default'), 'default')
+
+    def test_expired_keys_are_invisible(self):
+        self.cache.set('key', 'value', timeout=-1)
+        self.assertIsNone(self.cache.get('key'))
+        self.assertFalse(self.cache.has_key('key'))
+        self.assertTrue(self.cache.add('key', 'value'))
+        self.cache.set('forever', 'value', timeout=None)
+        self.assertTrue(self.cache.touch('forever', 10))
+
+    def test_incr_is_atomic_between_connections(self):
+        """Параллельные incr из разных соединений не теряют обновлений"""
+        self.cache.set('counter', 0)
+
+        def bump(_):
+            for _ in range(25):
+                self.cache.incr('counter')
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(bump, range(8)))
+        self.assertEqual(self.cache.get('counter'), 200)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_cull_keeps_entries_under_limit(self):
+        for number in range(200):
+            self.cache.set(f'key{number}', number)
+        count = self.cache._db.execute(
+            'SELECT count(*) FROM cache'
+        ).fetchone()[0]
+        self.assertLess(count, 200)
+
+    def test_cull_evicts_keys_without_expiry(self):
+        """Бессрочные ключи тоже вытесняются, начиная с самых старых"""
+        for number in range(200):
+            self.cache.set(f'key{number}', number, timeout=None)
+        count = self.cache._db.execute(
+            'SELECT count(*) FROM cache'
+        ).fetchone()[0]
+        self.assertLess(count, 200)
+        self.assertIsNone(self.cache.get('key0'))
+        self.assertEqual(self.cache.get('key199'), 199)
+
+
+@override_settings(CACHES=CACHES)
+class TwoTierCacheTests(SimpleTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def test_reads_are_served_from_process_memory(self):
+        """Пока не истёк L1, изменения соседей не видны"""
+        cache = caches['default']
+        cache.set('key', 'first')
+        caches['shared'].set('key', 'from another process')
+        self.assertEqual(cache.get('key'), 'first')
+        cache.l1.clear()
+        self.assertEqual(cache.get('key'), 'from another process')
+
+    def test_get_many_fills_l1_from_shared(self):
+        cache = caches['default']
+        caches['shared'].set_many({'a': 1, 'b': 2})
+        self.assertEqual(cache.get_many(['a', 'b', 'c']), {'a': 1, 'b': 2})
+        self.assertEqual(cache.l1.get('a'), 1)
+
+    def test_incr_and_delete_reach_shared_cache(self):
+        cache = caches['default']
+        cache.set('version', 1, None)
+        self.assertEqual(cache.get('version'), 1)
+        self.assertEqual(cache.incr('version'), 2)
+        self.assertEqual(cache.get('version'), 2)
+        self.assertEqual(caches['shared'].get('version'), 2)
+        cache.delete('version')
+        self.assertIsNone(caches['shared'].get('version'))
+        self.assertFalse(cache.add('added', 1) and cache.add('added', 2))
+
+
+class TestRunnerCacheTests(SimpleTestCase):
+    def test_tests_do_not_use_working_cache_file(self):
+        """TEST_RUNNER подменяет рабочий cache.sqlite3 кэшем в памяти"""
+        self.assertNotIsInstance(caches['shared'], SQLiteCache)
@@ -0,0 +1,47 @@
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+
+from .. import db_benchmark
+from ..db import bulk_insert
+from posts.models import Group
+
+
+class SQLitePragmaTests(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_are_applied_on_connect(self):
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+        self.assertEqual(self.pragma('cache_size'), -20000)
+        self.assertEqual(self.pragma('temp_store'), 2)
+
+
+class BulkInsertTests(TransactionTestCase):
+    def test_objects_get_pks_of_inserted_rows(self):
+        Group.objects.create(title='Было', slug='old', description='')
+        groups = [
+            Group(title=f'Группа {i}', slug=f'g{i}', description='')
+            for i in range(3)
+        ]
+        with transaction.atomic():
+            bulk_insert(Group, groups)
+        for group in groups:
+            self.assertEqual(Group.objects.get(pk=group.pk).slug, group.slug)
+
+    def test_requires_transaction(self):
+        with self.assertRaises(transaction.TransactionManagementError):
+            bulk_insert(Group, [Group(title='Г', slug='g', description='')])
+
+
+class ConcurrencyBenchmarkTests(SimpleTestCase):
+    def test_wal_readers_are_not_blocked_by_writers(self):
+        """В WAL читатели и писатели работают одновременно без ошибок"""
+        result = db_benchmark.run(
+            readers=2, writers=1, duration=0.5, modes=['wal']
+        )['wal']
+        self.assertGreater(result['reads_per_s'], 0)
+        self.assertGreater(result['writes_per_s'], 0)
+        self.assertEqual(result['locked_errors'], 0)
@@ -0,0 +1,106 @@
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import profiling
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class ProfilingMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='uniqueslug',
+            description='Тестовое описание',
+        )
+        for i in range(3):
+            Post.objects.create(
+                author=cls.user, group=cls.group, text=f'Тестовый пост {i}'
+            )
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.log = os.path.join(self.temp_dir, 'profile.log')
+        override = override_settings(PROFILING_LOG=self.log)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        self.staff_client = Client()
+        self.staff_client.force_login(ProfilingMiddlewareTests.staff)
+        self.user_client = Client()
+        self.user_client.force_login(ProfilingMiddlewareTests.user)
+        cache.clear()
+
+    def records(self):
+        return list(profiling.read_records())
+
+    def test_header_profiles_staff_requests(self):
+        """Заголовок сотрудника даёт профиль в логе и Server-Timing"""
+        response = self.staff_client.get(
+            reverse('posts:group_list', kwargs={'slug': 'uniqueslug'}),
+            HTTP_X_PROFILE='1',
+        )
+        self.assertIn('db;dur=', response['Server-Timing'])
+        [record] = self.records()
+        self.assertEqual(record['view'], 'posts:group_list')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['db']['queries'], 0)
+        self.assertGreater(record['templates']['ms'], 0)
+        self.assertIn(
+            'includes/post_form.html', record['templates']['renders']
+        )
+        self.assertIn('miss', record['cache'])
+
+    def test_header_is_ignored_for_other_users(self):
+        response = self.user_client.get(
+            reverse('posts:index'), HTTP_X_PROFILE='1'
+        )
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertEqual(self.records(), [])
+
+    @override_settings(PROFILING_SAMPLE_RATE=1.0)
+    def test_sampling_profiles_anonymous_requests(self):
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        records = self.records()
+        self.assertEqual(len(records), 2)
+        self.assertGreater(
+            records[1]['cache'].get('l1_hit', 0), 0,
+            'вторая главная берётся из кэша страницы'
+        )
+
+    def test_duplicated_statements_are_reported(self):
+        profile = profiling.Profile()
+        with profiling.activate(profile):
+            with connection.execute_wrapper(profile.execute):
+                for _ in range(3):
+                    list(User.objects.filter(username='auth'))
+                list(User.objects.filter(username='staff'))
+        duplicates = profile.as_dict()['db']['duplicates']
+        self.assertEqual(len(duplicates), 1)
+        self.assertEqual(duplicates[0]['count'], 3)
+
+    def test_summary_is_staff_only_and_grouped_by_view(self):
+        url = reverse('profile_summary')
+        self.assertEqual(self.user_client.get(url).status_code, 302)
+        for _ in range(2):
+            self.staff_client.get(reverse('posts:index'), HTTP_X_PROFILE='1')
+        response = self.staff_client.get(url)
+        [row] = [
+            row for row in response.context['rows']
+            if row['view'] == 'posts:index'
+        ]
+        self.assertEqual(row['requests'], 2)
+        self.assertLessEqual(row['avg_ms'], row['p95_ms'])
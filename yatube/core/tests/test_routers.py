@@ -0,0 +1,126 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.db import transaction
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from .. import routers
+from ..db import copy_sqlite
+from ..middleware import PIN_COOKIE
+from posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = routers.ReplicaRouter()
+
+    def test_reads_go_to_replica_only_inside_pin(self):
+        """Команды и воркеры без pin() читают из основной базы"""
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+        with routers.pin():
+            self.assertEqual(self.router.db_for_read(Post), 'replica')
+
+    def test_reads_after_write_go_to_primary(self):
+        """В запросе, который уже писал, чтение идёт в основную базу"""
+        with routers.pin() as state:
+            self.router.db_for_write(Post)
+            self.assertTrue(state.wrote)
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_session_writes_do_not_pin(self):
+        """Продление сессии на GET не закрепляет клиента за основной базой"""
+        with routers.pin() as state:
+            self.router.db_for_write(Session)
+            self.assertFalse(state.wrote)
+            self.assertEqual(self.router.db_for_read(Post), 'replica')
+
+    def test_pinned_requests_and_sessions_read_primary(self):
+        with routers.pin(pinned=True):
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+        self.assertEqual(self.router.db_for_read(Session), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_reads_primary(self):
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTransactionTests(TestCase):
+    def test_reads_inside_transaction_go_to_primary(self):
+        """Реплика не видит незакоммиченных данных транзакции"""
+        router = routers.ReplicaRouter()
+        with routers.pin(), transaction.atomic():
+            self.assertEqual(router.db_for_read(Post), 'default')
+
+
+# Реплика-зеркало в тестах — отдельное соединение, которое не видит
+# данных из транзакции теста, поэтому «репликой» служит сама default.
+@override_settings(DATABASE_REPLICAS=['default'])
+class ReplicaPinMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(ReplicaPinMiddlewareTests.user)
+
+    def test_write_sets_pin_cookie(self):
+        """После комментария клиент читает свои записи из основной базы"""
+        self.client.get(reverse('posts:index'))
+        self.assertNotIn(PIN_COOKIE, self.client.cookies)
+        self.client.post(
+            reverse('posts:add_comment', kwargs={
+                'post_id': ReplicaPinMiddlewareTests.post.pk
+            }),
+            {'text': 'Новый комментарий'},
+        )
+        self.assertIn(PIN_COOKIE, self.client.cookies)
+
+    @override_settings(SESSION_SAVE_EVERY_REQUEST=True)
+    def test_session_write_on_get_does_not_set_pin_cookie(self):
+        self.client.get(reverse('posts:index'))
+        self.assertNotIn(PIN_COOKIE, self.client.cookies)
+
+    def test_follow_sets_pin_cookie(self):
+        author = User.objects.create_user(username='author')
+        self.client.get(
+            reverse('posts:profile_follow', kwargs={'username': 'author'})
+        )
+        self.assertTrue(author.following.exists())
+        self.assertIn(PIN_COOKIE, self.client.cookies)
+
+
+class SyncReplicaTests(SimpleTestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+
+    def test_copy_sqlite_replaces_replica_contents(self):
+        source = os.path.join(self.temp_dir, 'primary.sqlite3')
+        target = os.path.join(self.temp_dir, 'replica.sqlite3')
+        with sqlite3.connect(target) as db:
+            db.execute('CREATE TABLE stale (text TEXT)')
+        with sqlite3.connect(source) as db:
+            db.execute('CREATE TABLE post (text TEXT)')
+            db.execute("INSERT INTO post VALUES ('пост')")
+        copy_sqlite(source, target)
+        with sqlite3.connect(target) as db:
+            self.assertEqual(
+                db.execute('SELECT text FROM post').fetchall(), [('пост',)]
+            )
+            tables = db.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            ).fetchall()
+            self.assertEqual(tables, [('post',)])
@@ -0,0 +1,18 @@
+from django.test import SimpleTestCase
+
+from ..stats import latency_percentiles, percentile
+
+
+class PercentileTests(SimpleTestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.95), 95)
+        self.assertEqual(percentile([3.0], 0.95), 3.0)
+        self.assertEqual(percentile([], 0.95), 0)
+
+    def test_latency_percentiles(self):
+        self.assertEqual(
+            latency_percentiles([0.1234, 0.5, 0.9], (0.5, 0.99), digits=2),
+            {'p50_ms': 0.5, 'p99_ms': 0.9},
+        )
@@ -1,5 +1,9 @@
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.shortcuts import render
 
+from . import profiling
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -15,3 +19,12 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+@staff_member_required
+def profile_summary(request):
+    rows = profiling.summarize(profiling.read_records())
+    return render(request, 'core/profile.html', {
+        'rows': rows,
+        'header': settings.PROFILING_HEADER,
+    })
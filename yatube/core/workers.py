@@ -0,0 +1,14 @@
+"""Запуск Django в дочерних процессах воркеров.
+
+Модуль не импортирует моделей: процесс, созданный через ``spawn``,
+сначала импортирует инициализатор и только потом настраивает Django.
+"""
+import os
+
+import django
+
+
+def setup_django() -> None:
+    """Вызывается первым в дочернем процессе: настраивает Django."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    django.setup()
@@ -0,0 +1,22 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'task',
+        'status',
+        'attempts',
+        'run_at',
+        'finished',
+    )
+    # В аргументах задач бывают адреса и другие личные данные.
+    exclude = ('payload',)
+    search_fields = ('task', 'key')
+    list_filter = ('status', 'task')
+    empty_value_display = '-пусто-'
+
+
+admin.site.register(Job, JobAdmin)
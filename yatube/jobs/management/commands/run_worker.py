@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs import queue, worker
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет отложенные задачи из очереди jobs: миниатюры картинок, '
+        'письма и другую работу, вынесенную из запросов. Заодно удаляет '
+        'завершённые задачи старше JOBS_KEEP_FINISHED.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int,
+            default=settings.JOBS_WORKER_PROCESSES,
+        )
+        parser.add_argument(
+            '--poll', type=float, default=settings.JOBS_POLL_INTERVAL,
+            help='Пауза в секундах, когда готовых задач нет.',
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Выполнить готовые задачи и выйти.',
+        )
+
+    def handle(self, *args, **options):
+        if options['processes'] < 1:
+            raise CommandError('Нужен хотя бы один процесс')
+        if options['burst'] and options['processes'] == 1:
+            done = queue.run_pending()
+            queue.prune()
+            self.stdout.write(
+                self.style.SUCCESS(f'Выполнено задач: {done}')
+            )
+            return
+        self.stdout.write(
+            f'Воркеров: {options["processes"]}, остановка — Ctrl+C'
+        )
+        worker.run(options['processes'], options['poll'], options['burst'])
+        self.stdout.write(self.style.SUCCESS('Воркеры остановлены'))
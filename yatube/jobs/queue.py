@@ -0,0 +1,205 @@
+"""Очередь отложенных задач в таблице основной базы.
+
+Задача — функция, объявленная декоратором ``task`` в модуле ``tasks.py``
+приложения. ``enqueue`` пишет строку ``Job`` в той же транзакции, что
+и данные, ради которых ставится задача: воркер не увидит её до
+коммита, а откат отменит и её.
+
+Воркеры (``manage.py run_worker``) забирают задачу условным UPDATE:
+её получает тот, чей UPDATE изменил строку. Блокировки вроде
+``SELECT ... FOR UPDATE`` не нужны, поэтому очередь работает и в SQLite.
+Задача упавшего воркера освобождается, когда истекает аренда
+``JOBS_LEASE_SECONDS``. Ошибка откладывает повтор с экспоненциально
+растущей паузой; после ``max_attempts`` попыток задача остаётся
+в состоянии ``failed`` с текстом ошибки. Выполненные и упавшие задачи
+старше ``JOBS_KEEP_FINISHED`` удаляет ``prune``, его вызывает воркер.
+
+С ``JOBS_EAGER = True`` задачу выполняет тот же процесс сразу после
+коммита транзакции, в которой её поставили, — для разработки и
+установок без воркеров. Отложенные задачи и повторы упавших
+по-прежнему ждут ``run_worker``.
+"""
+import json
+import logging
+import os
+import socket
+import traceback
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Callable, Dict, Optional, Sequence, Union
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Сколько готовых задач просматривать за одну попытку их забрать.
+CLAIM_BATCH: int = 10
+
+_registry: Dict[str, Callable] = {}
+
+
+class JobError(Exception):
+    pass
+
+
+def task(name: Optional[str] = None, max_attempts: int = 3):
+    """Регистрирует функцию как задачу очереди.
+
+    Аргументы задачи хранятся в JSON, поэтому передавать стоит id
+    и строки, а не объекты моделей.
+    """
+    def decorator(func: Callable) -> Callable:
+        func.task_name = name or f'{func.__module__}.{func.__name__}'
+        func.max_attempts = max_attempts
+        _registry[func.task_name] = func
+        return func
+    return decorator
+
+
+def enqueue(
+    func: Union[Callable, str],
+    args: Sequence = (),
+    kwargs: Optional[dict] = None,
+    key: Optional[str] = None,
+    run_at: Optional[datetime] = None,
+    delay: float = 0,
+) -> Job:
+    """Ставит задачу в очередь и возвращает её строку.
+
+    С ключом ``key`` задача ставится не больше одного раза: повторный
+    вызов вернёт уже существующую строку в любом её состоянии.
+    """
+    name = getattr(func, 'task_name', func)
+    if name not in _registry:
+        raise JobError(f'Неизвестная задача {name}')
+    fields = {
+        'task': name,
+        'payload': json.dumps({'args': list(args), 'kwargs': kwargs or {}}),
+        'run_at': run_at or timezone.now() + timedelta(seconds=delay),
+        'max_attempts': _registry[name].max_attempts,
+    }
+    if key is None:
+        job = Job.objects.create(**fields)
+    else:
+        job = Job.objects.get_or_create(key=key, defaults=fields)[0]
+    if settings.JOBS_EAGER:
+        # До коммита откат ещё может отменить и задачу, и её данные.
+        transaction.on_commit(partial(_run_eagerly, job.pk))
+    return job
+
+
+def worker_name() -> str:
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _ready(now: datetime) -> Q:
+    return (
+        Q(status=Job.QUEUED, run_at__lte=now)
+        | Q(status=Job.RUNNING, locked_until__lt=now)
+    )
+
+
+def claim(worker: str) -> Optional[Job]:
+    """Забирает одну готовую задачу или возвращает None."""
+    now = timezone.now()
+    candidates = Job.objects.filter(_ready(now)).order_by(
+        'run_at', 'pk'
+    ).values_list('pk', flat=True)[:CLAIM_BATCH]
+    for pk in candidates:
+        job = _take(pk, worker, now)
+        if job is not None:
+            return job
+    return None
+
+
+def _take(pk: int, worker: str, now: datetime) -> Optional[Job]:
+    # Строку мог забрать другой воркер между SELECT и UPDATE —
+    # тогда условие уже не выполняется и UPDATE ничего не меняет.
+    claimed = Job.objects.filter(_ready(now), pk=pk).update(
+        status=Job.RUNNING,
+        locked_by=worker,
+        locked_until=now + timedelta(seconds=settings.JOBS_LEASE_SECONDS),
+        attempts=F('attempts') + 1,
+    )
+    return Job.objects.get(pk=pk) if claimed else None
+
+
+def _run_eagerly(pk: int) -> None:
+    # Отложенную или уже выполненную задачу _take не возьмёт.
+    job = _take(pk, worker_name(), timezone.now())
+    if job is not None:
+        run(job)
+
+
+def _finish(job: Job, **fields) -> None:
+    # Если аренда истекла и задачу уже взял другой воркер,
+    # его результат важнее.
+    Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(
+        locked_until=None, **fields
+    )
+
+
+def _fail(job: Job, error: str, final: bool) -> None:
+    now = timezone.now()
+    if final or job.attempts >= job.max_attempts:
+        logger.error('Задача %s не выполнена: %s', job, error)
+        _finish(job, status=Job.FAILED, last_error=error, finished=now)
+        return
+    pause = settings.JOBS_RETRY_DELAY * 2 ** (job.attempts - 1)
+    _finish(
+        job,
+        status=Job.QUEUED,
+        last_error=error,
+        locked_by='',
+        run_at=now + timedelta(seconds=pause),
+    )
+
+
+def run(job: Job) -> bool:
+    """Выполняет взятую задачу и записывает результат."""
+    func = _registry.get(job.task)
+    if func is None:
+        _fail(job, f'Неизвестная задача {job.task}', final=True)
+        return False
+    if job.attempts > job.max_attempts:
+        # Попытку съел воркер, который упал, не дойдя до _fail.
+        _fail(job, 'Истекла аренда последней попытки', final=True)
+        return False
+    payload = json.loads(job.payload)
+    try:
+        func(*payload['args'], **payload['kwargs'])
+    except Exception:
+        _fail(job, traceback.format_exc(), final=False)
+        return False
+    _finish(job, status=Job.DONE, last_error='', finished=timezone.now())
+    return True
+
+
+def run_pending(worker: Optional[str] = None, limit: int = None) -> int:
+    """Выполняет готовые задачи, пока они есть; возвращает их число."""
+    worker = worker or worker_name()
+    done = 0
+    while limit is None or done < limit:
+        close_old_connections()
+        job = claim(worker)
+        if job is None:
+            break
+        run(job)
+        done += 1
+    return done
+
+
+def prune() -> int:
+    """Удаляет завершённые задачи старше ``JOBS_KEEP_FINISHED``."""
+    cutoff = timezone.now() - timedelta(
+        seconds=settings.JOBS_KEEP_FINISHED
+    )
+    deleted, _ = Job.objects.filter(
+        status__in=(Job.DONE, Job.FAILED), finished__lt=cutoff
+    ).delete()
+    return deleted
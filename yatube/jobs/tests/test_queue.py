@@ -0,0 +1,141 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .. import queue
+from ..models import Job
+
+calls = []
+
+
+@queue.task(name='jobs.tests.record')
+def record(value, suffix=''):
+    calls.append(f'{value}{suffix}')
+
+
+@queue.task(name='jobs.tests.explode', max_attempts=2)
+def explode():
+    raise RuntimeError('сломалось')
+
+
+@override_settings(JOBS_RETRY_DELAY=10, JOBS_LEASE_SECONDS=60)
+class QueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_job_runs_once_with_its_arguments(self):
+        job = queue.enqueue(record, args=['пост'], kwargs={'suffix': '!'})
+        self.assertEqual(queue.run_pending('test'), 1)
+        self.assertEqual(calls, ['пост!'])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNotNone(job.finished)
+        self.assertEqual(queue.run_pending('test'), 0)
+
+    def test_idempotency_key_enqueues_once(self):
+        first = queue.enqueue(record, args=[1], key='однажды')
+        second = queue.enqueue('jobs.tests.record', args=[2], key='однажды')
+        self.assertEqual(first.pk, second.pk)
+        queue.run_pending('test')
+        self.assertEqual(calls, ['1'])
+        # Выполненная задача с тем же ключом не ставится снова.
+        queue.enqueue(record, args=[3], key='однажды')
+        self.assertEqual(queue.run_pending('test'), 0)
+
+    def test_scheduled_job_waits_for_its_time(self):
+        job = queue.enqueue(record, args=['позже'], delay=3600)
+        self.assertEqual(queue.run_pending('test'), 0)
+        Job.objects.filter(pk=job.pk).update(
+            run_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(queue.run_pending('test'), 1)
+        self.assertEqual(calls, ['позже'])
+
+    def test_failed_job_is_retried_then_given_up(self):
+        job = queue.enqueue(explode)
+        queue.run_pending('test')
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertIn('сломалось', job.last_error)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=5))
+        self.assertEqual(queue.run_pending('test'), 0, 'ждёт паузу')
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            queue.run_pending('test')
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_job_of_lost_worker_is_taken_again(self):
+        job = queue.enqueue(record, args=['снова'])
+        self.assertEqual(queue.claim('упавший').pk, job.pk)
+        self.assertIsNone(queue.claim('другой'), 'аренда ещё не истекла')
+        Job.objects.filter(pk=job.pk).update(
+            locked_until=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(queue.run_pending('другой'), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.locked_by, 'другой')
+        self.assertEqual(job.attempts, 2)
+
+    def test_unknown_task_is_rejected(self):
+        with self.assertRaises(queue.JobError):
+            queue.enqueue('jobs.tests.missing')
+
+    @override_settings(JOBS_KEEP_FINISHED=3600)
+    def test_prune_removes_old_finished_jobs(self):
+        old = queue.enqueue(record, args=['старая'])
+        fresh = queue.enqueue(record, args=['новая'])
+        waiting = queue.enqueue(record, args=['ждёт'], delay=7200)
+        queue.run_pending('test')
+        Job.objects.filter(pk=old.pk).update(
+            finished=timezone.now() - timedelta(hours=2)
+        )
+        Job.objects.filter(pk=waiting.pk).update(
+            created=timezone.now() - timedelta(hours=2)
+        )
+        self.assertEqual(queue.prune(), 1)
+        self.assertEqual(
+            set(Job.objects.values_list('pk', flat=True)),
+            {fresh.pk, waiting.pk},
+        )
+
+    def test_run_worker_burst(self):
+        queue.enqueue(record, args=['a'])
+        queue.enqueue(record, args=['b'])
+        out = StringIO()
+        call_command('run_worker', '--burst', '--processes', '1', stdout=out)
+        self.assertIn('Выполнено задач: 2', out.getvalue())
+        self.assertEqual(sorted(calls), ['a', 'b'])
+
+
+# on_commit срабатывает только вне транзакции теста.
+@override_settings(JOBS_EAGER=True)
+class EagerQueueTests(TransactionTestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_job_runs_right_after_commit(self):
+        with transaction.atomic():
+            job = queue.enqueue(record, args=['сразу'])
+            self.assertEqual(calls, [])
+        self.assertEqual(calls, ['сразу'])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+
+    def test_rolled_back_and_delayed_jobs_do_not_run(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                queue.enqueue(record, args=['откат'])
+                raise RuntimeError
+        job = queue.enqueue(record, args=['позже'], delay=3600)
+        self.assertEqual(calls, [])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
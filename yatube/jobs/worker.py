@@ -0,0 +1,63 @@
+"""Процессы ``manage.py run_worker``.
+
+Каждый процесс в цикле выполняет готовые задачи, а когда очередь
+пуста, ждёт ``poll`` секунд. Раз в ``PRUNE_INTERVAL`` секунд он же
+удаляет старые завершённые задачи. SIGINT и SIGTERM получает родитель:
+он просит процессы остановиться, и те дорабатывают текущую задачу.
+Модуль не импортирует моделей на верхнем уровне — дочерний процесс
+создаётся через ``spawn`` и настраивает Django сам.
+"""
+import signal
+import time
+from multiprocessing import get_context
+
+from core.workers import setup_django
+
+PRUNE_INTERVAL: int = 3600
+
+
+def serve(poll: float, burst: bool, stop) -> int:
+    from . import queue
+
+    worker = queue.worker_name()
+    done = 0
+    pruned = None
+    while not stop.is_set():
+        done += queue.run_pending(worker)
+        if pruned is None or time.monotonic() - pruned >= PRUNE_INTERVAL:
+            queue.prune()
+            pruned = time.monotonic()
+        if burst:
+            break
+        stop.wait(poll)
+    return done
+
+
+def _process(poll: float, burst: bool, stop) -> None:
+    # Ctrl+C приходит всей группе процессов; остановкой управляет родитель.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    setup_django()
+    serve(poll, burst, stop)
+
+
+def run(processes: int, poll: float, burst: bool = False) -> None:
+    context = get_context('spawn')
+    stop = context.Event()
+    children = [
+        context.Process(
+            target=_process, args=(poll, burst, stop), daemon=True
+        )
+        for _ in range(processes)
+    ]
+    for child in children:
+        child.start()
+    previous = {
+        number: signal.signal(number, lambda *args: stop.set())
+        for number in (signal.SIGINT, signal.SIGTERM)
+    }
+    try:
+        for child in children:
+            child.join()
+    finally:
+        for number, handler in previous.items():
+            signal.signal(number, handler)
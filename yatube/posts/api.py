@@ -0,0 +1,151 @@
+"""Лёгкое JSON API для чтения лент.
+
+Ленты строятся теми же запросами и тем же курсорным пагинатором, что
+и HTML-страницы, но через ``.values()``: объекты моделей не создаются,
+а ``?fields=`` сужает список выбираемых столбцов. Общая лента отвечает
+на условные GET-запросы по тому же ETag, что и главная страница.
+"""
+from typing import Dict, List, Optional, Tuple
+
+from django.core.files.storage import default_storage
+from django.http import HttpRequest, JsonResponse
+from django.views.decorators.http import condition, require_GET
+
+from . import groups, versions
+from .models import Comment, Post, User
+from .paginators import CursorPaginator
+from .utils import CNT_COMMENTS_IN_PAGE, CNT_POSTS_IN_PAGE
+
+# Имя поля в ответе -> путь для .values().
+POST_FIELDS: Dict[str, str] = {
+    'id': 'pk',
+    'text': 'text',
+    'created': 'created',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+    'comments_count': 'comments_count',
+}
+COMMENT_FIELDS: Dict[str, str] = {
+    'id': 'pk',
+    'post': 'post_id',
+    'text': 'text',
+    'created': 'created',
+    'author': 'author__username',
+}
+# Лента подписок читается из TimelineEntry, поля поста — через join.
+TIMELINE_FIELDS: Dict[str, str] = {
+    name: 'post_id' if path == 'pk' else f'post__{path}'
+    for name, path in POST_FIELDS.items()
+}
+
+
+def _error(message: str, status: int) -> JsonResponse:
+    return JsonResponse({'error': message}, status=status)
+
+
+def _parse_fields(request: HttpRequest, available: Dict[str, str]) -> List:
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(available)
+    names = list(dict.fromkeys(
+        name.strip() for name in raw.split(',') if name.strip()
+    ))
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ValueError(
+            f'Неизвестные поля: {", ".join(unknown)}; '
+            f'доступны: {", ".join(available)}'
+        )
+    return names
+
+
+def _page_url(request: HttpRequest, cursor: Optional[str]) -> Optional[str]:
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query['cursor'] = cursor
+    return f'{request.path}?{query.urlencode()}'
+
+
+def _serialize(row: dict, fields: List[str], mapping: Dict[str, str]):
+    item = {}
+    for name in fields:
+        value = row[mapping[name]]
+        if name == 'image':
+            value = default_storage.url(value) if value else None
+        item[name] = value
+    return item
+
+
+def _feed(
+    request: HttpRequest,
+    queryset,
+    mapping: Dict[str, str],
+    keys: Tuple[str, str] = ('created', 'pk'),
+    per_page: int = CNT_POSTS_IN_PAGE,
+) -> JsonResponse:
+    try:
+        fields = _parse_fields(request, mapping)
+    except ValueError as error:
+        return _error(str(error), 400)
+    # Ключи курсора выбираются всегда, даже если их нет в ?fields=.
+    paths = dict.fromkeys([*keys, *(mapping[name] for name in fields)])
+    paginator = CursorPaginator(queryset.values(*paths), per_page, keys)
+    page = paginator.get_cursor_page(request.GET.get('cursor'))
+    return JsonResponse({
+        'results': [_serialize(row, fields, mapping) for row in page],
+        'next': _page_url(request, page.next_cursor),
+        'previous': _page_url(request, page.previous_cursor),
+    })
+
+
+@require_GET
+@condition(etag_func=versions.index_etag)
+def posts(request):
+    return _feed(request, Post.objects.all(), POST_FIELDS)
+
+
+@require_GET
+def group_posts(request, slug):
+    # Тот же реестр групп, что и у HTML-страниц группы.
+    group = groups.get(slug)
+    if group is None:
+        return _error('Группа не найдена', 404)
+    return _feed(request, Post.objects.filter(group_id=group.pk), POST_FIELDS)
+
+
+@require_GET
+def profile_posts(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True
+    ).first()
+    if author_id is None:
+        return _error('Автор не найден', 404)
+    return _feed(
+        request, Post.objects.filter(author_id=author_id), POST_FIELDS
+    )
+
+
+@require_GET
+def post_comments(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        return _error('Пост не найден', 404)
+    return _feed(
+        request,
+        Comment.objects.filter(post_id=post_id),
+        COMMENT_FIELDS,
+        per_page=CNT_COMMENTS_IN_PAGE,
+    )
+
+
+@require_GET
+def follow(request):
+    if not request.user.is_authenticated:
+        return _error('Нужна авторизация', 401)
+    return _feed(
+        request,
+        request.user.timeline.all(),
+        TIMELINE_FIELDS,
+        keys=('created', 'post_id'),
+    )
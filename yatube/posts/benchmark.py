@@ -0,0 +1,123 @@
+"""Замеры числа SQL-запросов, задержки и памяти для представлений posts.
+
+Каждое представление вызывается через тестовый ``Client`` несколько раз
+подряд; кэш перед каждым вызовом сбрасывается, чтобы мерить работу
+самого представления, а не попадание в кэш страницы. Память меряется
+отдельным прогоном под ``tracemalloc``, чтобы не искажать задержку.
+"""
+import time
+import tracemalloc
+from typing import Callable, Dict, Tuple
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.stats import latency_percentiles
+from .models import Follow, Group, Post, User
+
+VIEWS: Tuple[str, ...] = (
+    'index',
+    'group_posts',
+    'profile',
+    'post_detail',
+    'follow_index',
+    'add_comment',
+    'post_create',
+)
+
+
+def _targets() -> Tuple[User, Dict[str, Tuple[str, str, dict]]]:
+    """Самые нагруженные объекты датасета: с ними запросы тяжелее всего."""
+    reader = (
+        Follow.objects.values('user').annotate(total=Count('pk'))
+        .order_by('-total', 'user').first()
+    )
+    reader = User.objects.get(pk=reader['user'])
+    author = User.objects.order_by('-stats__posts_count', 'pk').first()
+    group = Group.objects.order_by('-posts_count', 'pk').first()
+    post = Post.objects.order_by('-comments_count', '-pk').first()
+    return reader, {
+        'index': ('get', reverse('posts:index'), {}),
+        'group_posts': (
+            'get',
+            reverse('posts:group_list', kwargs={'slug': group.slug}),
+            {},
+        ),
+        'profile': (
+            'get',
+            reverse('posts:profile', kwargs={'username': author.username}),
+            {},
+        ),
+        'post_detail': (
+            'get',
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}),
+            {},
+        ),
+        'follow_index': ('get', reverse('posts:follow_index'), {}),
+        'add_comment': (
+            'post',
+            reverse('posts:add_comment', kwargs={'post_id': post.pk}),
+            {'text': 'Комментарий из бенчмарка'},
+        ),
+        'post_create': (
+            'post',
+            reverse('posts:post_create'),
+            {'text': 'Пост из бенчмарка', 'group': group.pk},
+        ),
+    }
+
+
+def _measure(request: Callable[[], object], repeat: int, warmup: int):
+    for _ in range(warmup):
+        cache.clear()
+        request()
+
+    timings = []
+    queries = []
+    for _ in range(repeat):
+        cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = request()
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(len(captured))
+        if response.status_code >= 400:
+            raise RuntimeError(
+                f'Представление вернуло {response.status_code}'
+            )
+
+    cache.clear()
+    tracemalloc.start()
+    try:
+        request()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'queries': max(queries),
+        **latency_percentiles(timings, (0.5, 0.95), digits=3),
+        'mean_ms': round(sum(timings) / len(timings), 3),
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+def run_views(
+    repeat: int = 20,
+    warmup: int = 2,
+    views: Tuple[str, ...] = VIEWS,
+) -> Dict[str, dict]:
+    """Меряет представления на текущих данных базы."""
+    reader, targets = _targets()
+    client = Client()
+    client.force_login(reader)
+    results = {}
+    for name in views:
+        method, url, data = targets[name]
+        send = getattr(client, method)
+        results[name] = _measure(lambda: send(url, data), repeat, warmup)
+    return results
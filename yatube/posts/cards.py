@@ -0,0 +1,50 @@
+"""Кэш отрендеренных карточек постов в лентах.
+
+Карточка одинакова для всех читателей, поэтому её HTML кэшируется
+по ключу из id поста, времени его изменения и числа комментариев.
+Всё, что меняет карточку, сдвигает ``Post.updated`` (или счётчик),
+и старый ключ просто перестаёт запрашиваться. Ссылка «изменить»
+зависит от читателя и добавляется уже вне кэша.
+"""
+from typing import Iterable, List, Tuple
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.safestring import SafeString, mark_safe
+
+from .models import Post
+
+CARD_TEMPLATE: str = 'includes/post_card.html'
+CARD_TIMEOUT: int = 60 * 60 * 24
+
+
+def card_key(post: Post) -> str:
+    return (
+        f'post_card:{post.pk}:{post.updated.timestamp()}'
+        f':{post.comments_count}'
+    )
+
+
+def render_cards(posts: Iterable[Post]) -> List[Tuple[Post, SafeString]]:
+    """Карточки страницы ленты: одно чтение кэша на всю страницу."""
+    posts = list(posts)
+    keys = [card_key(post) for post in posts]
+    cached = cache.get_many(keys)
+    rendered = {}
+    cards = []
+    for post, key in zip(posts, keys):
+        html = cached.get(key)
+        if html is None:
+            html = rendered[key] = render_to_string(
+                CARD_TEMPLATE, {'post': post}
+            )
+        cards.append((post, mark_safe(html)))
+    if rendered:
+        cache.set_many(rendered, CARD_TIMEOUT)
+    return cards
+
+
+def touch(posts) -> None:
+    """Делает карточки постов из queryset устаревшими."""
+    posts.update(updated=timezone.now())
@@ -0,0 +1,74 @@
+"""Денормализованные счётчики постов, комментариев и подписок.
+
+Счётчики меняются атомарным ``UPDATE ... SET x = x + 1`` в обработчиках
+сигналов, которые выполняются в транзакции сохранения записи. Массовые
+загрузки через ``bulk_create`` сигналов не вызывают — после них нужно
+запускать ``manage.py recount_counters``.
+"""
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from . import groups
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+def _shift(queryset, **deltas) -> int:
+    return queryset.update(
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+
+
+def shift_user(user_id: int, **deltas) -> None:
+    updated = _shift(UserStats.objects.filter(user_id=user_id), **deltas)
+    # Строки счётчиков может не быть у пользователя, созданного
+    # в обход сигналов; при уменьшении её нет, только если он удаляется.
+    if not updated and all(delta > 0 for delta in deltas.values()):
+        UserStats.objects.get_or_create(user_id=user_id)
+        recount_users(User.objects.filter(pk=user_id))
+
+
+def shift_group(group_id: int, delta: int) -> None:
+    if group_id is not None:
+        _shift(Group.objects.filter(pk=group_id), posts_count=delta)
+
+
+def shift_post(post_id: int, delta: int) -> None:
+    _shift(Post.objects.filter(pk=post_id), comments_count=delta)
+
+
+def _count_of(queryset, field: str):
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0
+    )
+
+
+def recount_users(users=None) -> None:
+    users = User.objects.all() if users is None else users
+    missing = users.filter(stats__isnull=True).values_list('pk', flat=True)
+    UserStats.objects.bulk_create(
+        (UserStats(user_id=pk) for pk in missing.iterator()),
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+    UserStats.objects.filter(user__in=users).update(
+        posts_count=_count_of(Post.objects, 'author'),
+        followers_count=_count_of(Follow.objects, 'author'),
+        following_count=_count_of(Follow.objects, 'user'),
+    )
+
+
+@transaction.atomic
+def recount_all() -> None:
+    """Пересчитывает все счётчики с нуля."""
+    Group.objects.update(posts_count=_count_of(Post.objects, 'group'))
+    groups.invalidate()
+    Post.objects.update(comments_count=_count_of(Comment.objects, 'post'))
+    recount_users()
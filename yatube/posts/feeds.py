@@ -0,0 +1,143 @@
+"""RSS и Atom ленты: общая, групп и авторов.
+
+Лента — это последние ``FEED_SIZE`` постов из того же индекса, что
+и HTML-страница. Готовый XML кэшируется в области версий страницы
+(главной, группы или автора), поэтому живёт до следующей записи
+в этой области. На условные GET-запросы отвечает ``304`` по версии
+области: ни запросов к ленте, ни генерации XML. Ленты одинаковы для
+всех читателей и не обращаются к сессии, поэтому кэш общий.
+"""
+from django.contrib.syndication.views import Feed
+from django.core.handlers.wsgi import WSGIRequest
+from django.shortcuts import get_object_or_404
+from django.urls import reverse, reverse_lazy
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.text import Truncator
+from django.views.decorators.http import condition
+
+from core.cache import versioned_cache_page
+from .models import Post, User
+from .utils import INDEX_CACHE_SCOPE, get_group_or_404
+from .versions import author_scope, group_scope, scope_versions
+
+FEED_SIZE: int = 20
+FEED_CACHE_TIMEOUT: int = 60 * 60 * 24
+
+
+def _get_author_or_404(request: WSGIRequest, username: str) -> User:
+    # Без состояния подписки, в отличие от utils.get_author_or_404:
+    # лента не должна трогать request.user и сессию.
+    loaded = request.__dict__.setdefault('_feed_authors', {})
+    if username not in loaded:
+        loaded[username] = get_object_or_404(User, username=username)
+    return loaded[username]
+
+
+class PostsFeed(Feed):
+    title = 'Yatube: последние записи'
+    link = reverse_lazy('posts:index')
+    description = 'Новые посты всех авторов'
+
+    def items(self):
+        return Post.objects.select_related('author', 'group')[:FEED_SIZE]
+
+    def item_title(self, post):
+        return Truncator(post.text).chars(60)
+
+    def item_description(self, post):
+        return post.text
+
+    def item_link(self, post):
+        return reverse('posts:post_detail', kwargs={'post_id': post.pk})
+
+    def item_author_name(self, post):
+        return post.author.get_full_name() or post.author.username
+
+    def item_pubdate(self, post):
+        return post.created
+
+    def item_updateddate(self, post):
+        return post.updated
+
+    def item_categories(self, post):
+        return (post.group.title,) if post.group else ()
+
+
+class GroupPostsFeed(PostsFeed):
+    def get_object(self, request, slug):
+        return get_group_or_404(request, slug)
+
+    def title(self, group):
+        return f'Yatube: {group.title}'
+
+    def link(self, group):
+        return reverse('posts:group_list', kwargs={'slug': group.slug})
+
+    def description(self, group):
+        return group.description
+
+    def items(self, group):
+        return group.posts.select_related('author', 'group')[:FEED_SIZE]
+
+
+class AuthorPostsFeed(PostsFeed):
+    def get_object(self, request, username):
+        return _get_author_or_404(request, username)
+
+    def title(self, author):
+        return f'Yatube: записи {author.username}'
+
+    def link(self, author):
+        return reverse('posts:profile', kwargs={'username': author.username})
+
+    def description(self, author):
+        return f'Новые посты автора {author.username}'
+
+    def items(self, author):
+        return author.posts.select_related('author', 'group')[:FEED_SIZE]
+
+
+class AtomPostsFeed(PostsFeed):
+    feed_type = Atom1Feed
+    subtitle = PostsFeed.description
+
+
+class AtomGroupPostsFeed(GroupPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, group):
+        return group.description
+
+
+class AtomAuthorPostsFeed(AuthorPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, author):
+        return f'Новые посты автора {author.username}'
+
+
+def _index_scope(request, *args, **kwargs) -> str:
+    return INDEX_CACHE_SCOPE
+
+
+def _group_scope(request, slug) -> str:
+    return group_scope(get_group_or_404(request, slug).pk)
+
+
+def _author_scope(request, username) -> str:
+    return author_scope(_get_author_or_404(request, username).pk)
+
+
+def _feed_view(feed: Feed, scope):
+    def etag(request, *args, **kwargs):
+        return scope_versions(scope(request, *args, **kwargs))
+    cached = versioned_cache_page(FEED_CACHE_TIMEOUT, scope)(feed)
+    return condition(etag_func=etag)(cached)
+
+
+posts_rss = _feed_view(PostsFeed(), _index_scope)
+posts_atom = _feed_view(AtomPostsFeed(), _index_scope)
+group_rss = _feed_view(GroupPostsFeed(), _group_scope)
+group_atom = _feed_view(AtomGroupPostsFeed(), _group_scope)
+author_rss = _feed_view(AuthorPostsFeed(), _author_scope)
+author_atom = _feed_view(AtomAuthorPostsFeed(), _author_scope)
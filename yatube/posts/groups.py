@@ -0,0 +1,45 @@
+"""Реестр групп: slug → группа с описанием и числом постов.
+
+Групп мало, а нужны они каждой странице группы, её лентам и каталогу
+``/groups/``. Реестр целиком читается одним запросом и лежит в кэше
+под одним ключом вместе с версией области ``groups``, для которой он
+собран. Сигналы поднимают версию, когда группу сохраняют или удаляют
+и когда меняется счётчик постов группы; реестр старой версии
+пересобирается и перезаписывает тот же ключ, поэтому старые версии
+не копятся в кэше.
+"""
+from typing import Dict, List, Optional
+
+from django.core.cache import cache
+
+from core.cache import bump_version, get_version
+from .models import Group
+
+REGISTRY_SCOPE: str = 'groups'
+REGISTRY_KEY: str = 'group_registry'
+
+
+def registry() -> Dict[str, Group]:
+    version = get_version(REGISTRY_SCOPE)
+    cached = cache.get(REGISTRY_KEY)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    groups = {group.slug: group for group in Group.objects.all()}
+    cache.set(REGISTRY_KEY, (version, groups), None)
+    return groups
+
+
+def get(slug: str) -> Optional[Group]:
+    return registry().get(slug)
+
+
+def directory() -> List[Group]:
+    """Группы для каталога: самые активные сверху."""
+    return sorted(
+        registry().values(),
+        key=lambda group: (-group.posts_count, group.title),
+    )
+
+
+def invalidate() -> None:
+    bump_version(REGISTRY_SCOPE)
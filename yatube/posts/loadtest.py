@@ -0,0 +1,279 @@
+"""Нагрузочный прогон пользовательских сценариев по HTTP.
+
+В отличие от ``posts.benchmark``, запросы идут через настоящий сервер:
+в замер попадают middleware, сессии, CSRF и шаблоны. Каждый
+виртуальный пользователь — поток со своей ``requests.Session``; он
+раз за разом выполняет случайный сценарий из ``JOURNEYS``, пока не
+истечёт время прогона. Просмотр лент всегда анонимный и идёт через
+отдельную сессию без кук входа. Задержки группируются по имени URL из
+``posts/urls.py`` (``posts:index``, ``posts:group_list`` и т. д.).
+
+Пользователи нагрузки создаются на один прогон со случайным паролем;
+``cleanup`` удаляет их вместе со всем, что они написали.
+"""
+import io
+import random
+import secrets
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Sequence
+
+import requests
+from django.core.files.storage import default_storage
+from django.urls import reverse
+
+from core.stats import latency_percentiles
+from .models import Follow, Group, Post, User
+
+JOURNEYS: Sequence[str] = ('browse', 'follow', 'create', 'comment')
+# Сценарии, которым нужен вход на сайт.
+AUTHENTICATED: Sequence[str] = ('follow', 'create', 'comment')
+USERNAME: str = 'loadtest-{run}-{number}'
+# Минимальный GIF 1x1: форма поста проверяет, что это картинка.
+SMALL_GIF: bytes = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+TIMEOUT: int = 30
+
+
+class Sample(NamedTuple):
+    name: str
+    seconds: float
+    ok: bool
+
+
+class Targets(NamedTuple):
+    group_slugs: List[str]
+    post_ids: List[int]
+    usernames: List[str]
+    password: str
+
+
+def prepare(users: int, follows: int = 10, sample: int = 200) -> Targets:
+    """Готовит пользователей нагрузки и выбирает страницы для сценариев.
+
+    Пользователи ``loadtest-<прогон>-<N>`` подписаны на самых плодовитых
+    авторов, чтобы лента подписок была непустой. Пароль общий для
+    прогона и случайный.
+    """
+    authors = list(
+        User.objects.order_by('-stats__posts_count', 'pk')
+        .values_list('pk', flat=True)[:follows]
+    )
+    run_id = secrets.token_hex(4)
+    password = secrets.token_urlsafe(16)
+    usernames = []
+    for number in range(users):
+        user = User.objects.create_user(
+            username=USERNAME.format(run=run_id, number=number),
+            password=password,
+        )
+        for author_id in authors:
+            Follow.objects.create(user=user, author_id=author_id)
+        usernames.append(user.username)
+    return Targets(
+        group_slugs=list(
+            Group.objects.order_by('-posts_count', 'pk')
+            .values_list('slug', flat=True)[:sample]
+        ),
+        post_ids=list(Post.objects.values_list('pk', flat=True)[:sample]),
+        usernames=usernames,
+        password=password,
+    )
+
+
+def cleanup(targets: Targets) -> None:
+    """Удаляет пользователей прогона, их посты, комментарии и картинки."""
+    users = User.objects.filter(username__in=targets.usernames)
+    images = list(
+        Post.objects.filter(author__in=users).exclude(image='')
+        .values_list('image', flat=True)
+    )
+    # Удаление по одному: сигналы поправят счётчики, ленты и версии.
+    for user in users:
+        user.delete()
+    for image in images:
+        default_storage.delete(image)
+
+
+class VirtualUser:
+    """Один поток нагрузки со своей сессией и куками."""
+
+    def __init__(
+        self,
+        base_url: str,
+        targets: Targets,
+        username: str,
+        record,
+        rnd: random.Random,
+    ):
+        self.base_url = base_url.rstrip('/')
+        self.targets = targets
+        self.username = username
+        self.record = record
+        self.rnd = rnd
+        self.session = requests.Session()
+        self.anonymous = requests.Session()
+        self.logged_in = False
+
+    def _request(
+        self,
+        method: str,
+        name: str,
+        path: str,
+        redirect: bool = False,
+        session: requests.Session = None,
+        **kwargs,
+    ):
+        """Запрос с замером; ``redirect`` — успехом считается только 3xx."""
+        session = session or self.session
+        started = time.perf_counter()
+        try:
+            response = session.request(
+                method, self.base_url + path, timeout=TIMEOUT, **kwargs
+            )
+            if redirect:
+                ok = 300 <= response.status_code < 400
+            else:
+                ok = response.status_code < 400
+        except requests.RequestException:
+            response, ok = None, False
+        self.record(Sample(name, time.perf_counter() - started, ok))
+        return response
+
+    def _post_form(self, name: str, path: str, data: dict, **kwargs):
+        # Django ждёт токен из куки csrftoken и в теле формы. Принятая
+        # форма отвечает редиректом, а форма с ошибками — кодом 200.
+        data = {
+            'csrfmiddlewaretoken': self.session.cookies.get('csrftoken', ''),
+            **data,
+        }
+        return self._request(
+            'post', name, path, redirect=True, data=data,
+            allow_redirects=False, **kwargs
+        )
+
+    def login(self) -> None:
+        path = reverse('users:login')
+        self._request('get', 'users:login', path)
+        response = self._post_form('users:login', path, {
+            'username': self.username, 'password': self.targets.password,
+        })
+        self.logged_in = (
+            response is not None and 300 <= response.status_code < 400
+        )
+
+    def browse(self) -> None:
+        session = self.anonymous
+        self._request(
+            'get', 'posts:index', reverse('posts:index'), session=session
+        )
+        if self.targets.group_slugs:
+            slug = self.rnd.choice(self.targets.group_slugs)
+            self._request('get', 'posts:group_list', reverse(
+                'posts:group_list', kwargs={'slug': slug}
+            ), session=session)
+        self._request(
+            'get', 'posts:index', reverse('posts:index'),
+            session=session, params={'page': 2},
+        )
+
+    def follow(self) -> None:
+        self._request(
+            'get', 'posts:follow_index', reverse('posts:follow_index')
+        )
+
+    def create(self) -> None:
+        path = reverse('posts:post_create')
+        self._request('get', 'posts:post_create', path)
+        image = ('loadtest.gif', io.BytesIO(SMALL_GIF), 'image/gif')
+        self._post_form(
+            'posts:post_create', path,
+            {'text': f'Пост нагрузочного теста {self.rnd.random()}'},
+            files={'image': image},
+        )
+
+    def comment(self) -> None:
+        if not self.targets.post_ids:
+            return
+        post_id = self.rnd.choice(self.targets.post_ids)
+        self._post_form(
+            'posts:add_comment',
+            reverse('posts:add_comment', kwargs={'post_id': post_id}),
+            {'text': 'Комментарий нагрузочного теста'},
+        )
+
+    def run(self, journeys: Sequence[str], deadline: float) -> None:
+        while time.monotonic() < deadline:
+            journey = self.rnd.choice(journeys)
+            if journey in AUTHENTICATED and not self.logged_in:
+                self.login()
+                if not self.logged_in:
+                    # Ошибка входа уже в отчёте; без входа сценарий
+                    # мерил бы редиректы на страницу входа.
+                    continue
+            getattr(self, journey)()
+
+
+def summarize(samples: List[Sample], elapsed: float) -> Dict[str, dict]:
+    """Запросы в секунду и процентили задержки по имени URL."""
+    by_name = defaultdict(list)
+    for sample in samples:
+        by_name[sample.name].append(sample)
+    by_name['total'] = samples
+    report = {}
+    for name, group in sorted(by_name.items()):
+        if not group:
+            continue
+        latencies = [sample.seconds * 1000 for sample in group]
+        report[name] = {
+            'requests': len(group),
+            'errors': sum(not sample.ok for sample in group),
+            'rps': round(len(group) / elapsed, 2),
+            **latency_percentiles(latencies),
+        }
+    return report
+
+
+def run(
+    base_url: str,
+    targets: Targets,
+    concurrency: int,
+    duration: float,
+    journeys: Sequence[str] = JOURNEYS,
+    seed: int = 0,
+) -> Dict[str, dict]:
+    """Гоняет ``concurrency`` виртуальных пользователей ``duration`` секунд.
+
+    Пользователей нагрузки в ``targets`` должно быть не меньше
+    ``concurrency``, если среди сценариев есть требующие входа.
+    """
+    samples: List[Sample] = []
+    lock = threading.Lock()
+
+    def record(sample: Sample) -> None:
+        with lock:
+            samples.append(sample)
+
+    rnd = random.Random(seed)
+    users = [
+        VirtualUser(
+            base_url, targets,
+            targets.usernames[number % len(targets.usernames)]
+            if targets.usernames else '',
+            record, random.Random(rnd.random()),
+        )
+        for number in range(concurrency)
+    ]
+    started = time.monotonic()
+    deadline = started + duration
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [
+            pool.submit(user.run, journeys, deadline) for user in users
+        ]:
+            future.result()
+    return summarize(samples, time.monotonic() - started)
@@ -0,0 +1,149 @@
+import json
+import os
+import platform
+import subprocess
+import tempfile
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    setup_test_environment, teardown_test_environment
+)
+from django.utils import timezone
+
+from core.testing import isolated_caches
+from posts import benchmark, seeding
+
+# Насколько может вырасти p95, прежде чем --compare сочтёт это регрессией.
+P95_TOLERANCE: float = 1.5
+
+
+class Command(BaseCommand):
+    help = (
+        'Меряет число запросов, p50/p95 задержки и пик памяти представлений '
+        'posts на синтетических данных разного объёма и пишет JSON-отчёт. '
+        'Данные создаются в отдельной тестовой базе, рабочая не меняется.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', nargs='+', type=int, default=[1000],
+            help='Число постов в датасетах, например 1000 100000 1000000.',
+        )
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--views', nargs='+', choices=benchmark.VIEWS,
+            default=list(benchmark.VIEWS),
+        )
+        parser.add_argument(
+            '--output', default='benchmark.json',
+            help='Куда записать отчёт.',
+        )
+        parser.add_argument(
+            '--compare', metavar='REPORT',
+            help='Прошлый отчёт: рост числа запросов или p95 — ошибка.',
+        )
+
+    def handle(self, *args, **options):
+        report = {'meta': self._meta(options), 'results': {}}
+        setup_test_environment()
+        try:
+            # Замеры чистят кэш — рабочий cache.sqlite3 не трогаем.
+            with isolated_caches():
+                for size in options['sizes']:
+                    report['results'][str(size)] = self._run_size(
+                        size, options
+                    )
+        finally:
+            teardown_test_environment()
+
+        with open(options['output'], 'w', encoding='utf-8') as output:
+            json.dump(report, output, ensure_ascii=False, indent=2,
+                      sort_keys=True)
+            output.write('\n')
+        self.stdout.write(
+            self.style.SUCCESS(f'Отчёт записан в {options["output"]}')
+        )
+
+        if options['compare']:
+            self._compare(options['compare'], report)
+
+    def _run_size(self, size: int, options: dict) -> dict:
+        self.stdout.write(f'Датасет на {size} постов...')
+        old_name = connection.settings_dict['NAME']
+        with tempfile.TemporaryDirectory() as directory:
+            if connection.vendor == 'sqlite':
+                # Файл, а не база в памяти: иначе замеры не похожи на прод.
+                connection.settings_dict['TEST']['NAME'] = os.path.join(
+                    directory, 'benchmark.sqlite3'
+                )
+            connection.creation.create_test_db(verbosity=0, autoclobber=True)
+            try:
+                dataset = seeding.seed_dataset(size, seed=options['seed'])
+                views = benchmark.run_views(
+                    repeat=options['repeat'],
+                    warmup=options['warmup'],
+                    views=tuple(options['views']),
+                )
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                connection.settings_dict['TEST']['NAME'] = None
+
+        for name, result in views.items():
+            self.stdout.write(
+                f'  {name:<14} {result["queries"]:>3} запр.  '
+                f'p50 {result["p50_ms"]:>8.2f} мс  '
+                f'p95 {result["p95_ms"]:>8.2f} мс  '
+                f'{result["peak_kib"]:>9.1f} КиБ'
+            )
+        return {'dataset': dataset, 'views': views}
+
+    def _meta(self, options: dict) -> dict:
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            'commit': commit,
+            'created': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'repeat': options['repeat'],
+            'seed': options['seed'],
+        }
+
+    def _compare(self, path: str, report: dict) -> None:
+        try:
+            with open(path, encoding='utf-8') as previous_file:
+                previous = json.load(previous_file)['results']
+        except (OSError, ValueError, KeyError) as error:
+            raise CommandError(f'Не удалось прочитать {path}: {error}')
+
+        problems = []
+        for size, current in report['results'].items():
+            for name, result in current['views'].items():
+                before = previous.get(size, {}).get('views', {}).get(name)
+                if before is None:
+                    continue
+                if result['queries'] > before['queries']:
+                    problems.append(
+                        f'{size}/{name}: запросов {before["queries"]} '
+                        f'→ {result["queries"]}'
+                    )
+                if result['p95_ms'] > before['p95_ms'] * P95_TOLERANCE:
+                    problems.append(
+                        f'{size}/{name}: p95 {before["p95_ms"]} мс '
+                        f'→ {result["p95_ms"]} мс'
+                    )
+        if problems:
+            raise CommandError(
+                'Регрессии относительно ' + path + ':\n' + '\n'.join(problems)
+            )
+        self.stdout.write(self.style.SUCCESS('Регрессий не найдено'))
@@ -0,0 +1,32 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает пользователей, группы, посты, комментарии и подписки '
+        'в NDJSON, читая базу потоком.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', default='-',
+            help='Файл выгрузки; по умолчанию stdout.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['output']
+        if path == '-':
+            written = transfer.export_to(sys.stdout)
+        else:
+            with open(path, 'w', encoding='utf-8') as output:
+                written = transfer.export_to(output, self._progress)
+            self.stdout.write(
+                self.style.SUCCESS(f'Выгружено записей: {written}')
+            )
+
+    def _progress(self, written):
+        self.stdout.write(f'Выгружено записей: {written}')
@@ -0,0 +1,41 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает выгрузку export_posts пачками. После сбоя повторный '
+        'запуск продолжает с контрольной точки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл NDJSON из export_posts.')
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл контрольной точки; по умолчанию <path>.checkpoint.',
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Игнорировать контрольную точку и начать сначала.',
+        )
+
+    def handle(self, *args, **options):
+        importer = transfer.Importer(options['path'], options['checkpoint'])
+        if options['restart'] and os.path.exists(importer.checkpoint):
+            os.remove(importer.checkpoint)
+        elif os.path.exists(importer.checkpoint):
+            self.stdout.write(f'Продолжение с {importer.checkpoint}')
+        try:
+            counts = importer.run(self._progress)
+        except (OSError, transfer.TransferError) as error:
+            raise CommandError(error)
+        summary = ', '.join(
+            f'{name}: {count}' for name, count in counts.items()
+        )
+        self.stdout.write(self.style.SUCCESS(f'Загружено — {summary}'))
+
+    def _progress(self, line):
+        self.stdout.write(f'Обработано строк: {line}')
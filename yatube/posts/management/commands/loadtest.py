@@ -0,0 +1,121 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import loadtest
+
+# Сколько ждать, пока поднимется локальный сервер.
+STARTUP_TIMEOUT: int = 30
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает сервер сценариями пользователей (просмотр лент, лента '
+        'подписок, новый пост с картинкой, комментарий) и печатает '
+        'запросы в секунду и p50/p95/p99 по именам URL. Без --url '
+        'поднимает runserver на свободном порту. Нагрузка пишет в базу из '
+        'настроек, поэтому запуск нужно подтвердить флагом '
+        '--allow-working-db; пользователи нагрузки и всё, что они '
+        'написали, удаляются после прогона.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url', help='Адрес уже запущенного сервера.',
+        )
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument(
+            '--duration', type=float, default=30,
+            help='Длительность прогона в секундах.',
+        )
+        parser.add_argument(
+            '--journeys', nargs='+', choices=loadtest.JOURNEYS,
+            default=list(loadtest.JOURNEYS),
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Куда записать JSON-отчёт.')
+        parser.add_argument(
+            '--allow-working-db', action='store_true',
+            help='Подтвердить, что нагрузка пишет в базу из настроек.',
+        )
+
+    def handle(self, *args, **options):
+        # И runserver, и сервер из --url работают с той же базой, что
+        # и команда: пользователей нагрузки нужно создать именно в ней.
+        if not options['allow_working_db']:
+            raise CommandError(
+                'Нагрузка создаст в базе из настроек пользователей, посты '
+                'и комментарии. Запустите с --allow-working-db.'
+            )
+        targets = loadtest.prepare(users=options['concurrency'])
+        try:
+            with self._server(options['url']) as url:
+                self.stdout.write(
+                    f'{options["concurrency"]} пользователей, '
+                    f'{options["duration"]:g} с, {url}'
+                )
+                report = loadtest.run(
+                    url, targets,
+                    concurrency=options['concurrency'],
+                    duration=options['duration'],
+                    journeys=options['journeys'],
+                    seed=options['seed'],
+                )
+        finally:
+            loadtest.cleanup(targets)
+
+        for name, result in report.items():
+            self.stdout.write(
+                f'  {name:<20} {result["requests"]:>6} запр. '
+                f'{result["errors"]:>4} ош.  {result["rps"]:>8.2f} rps  '
+                f'p50 {result["p50_ms"]:>8.2f}  p95 {result["p95_ms"]:>8.2f}  '
+                f'p99 {result["p99_ms"]:>8.2f} мс'
+            )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
+                output.write('\n')
+            self.stdout.write(
+                self.style.SUCCESS(f'Отчёт записан в {options["output"]}')
+            )
+
+    @contextmanager
+    def _server(self, url):
+        if url:
+            yield url
+            return
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'),
+             'runserver', '--noreload', f'127.0.0.1:{port}'],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        url = f'http://127.0.0.1:{port}'
+        try:
+            self._wait(url, server)
+            yield url
+        finally:
+            server.terminate()
+            server.wait()
+
+    def _wait(self, url, server):
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError('runserver завершился при запуске')
+            try:
+                requests.get(url, timeout=1)
+                return
+            except requests.RequestException:
+                time.sleep(0.2)
+        raise CommandError(f'Сервер {url} не ответил за {STARTUP_TIMEOUT} с')
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит недостающие миниатюры картинок постов '
+        '(например, для постов, загруженных до появления очереди задач).'
+    )
+
+    def handle(self, *args, **options):
+        images = (
+            Post.objects.exclude(image='')
+            .values_list('pk', 'image')
+            .iterator()
+        )
+        built = 0
+        for post_id, name in images:
+            if thumbnails.get_ready_thumbnail(name) is None:
+                thumbnails.generate_now(name, post_id)
+                built += 1
+        self.stdout.write(
+            self.style.SUCCESS(f'Построено миниатюр: {built}')
+        )
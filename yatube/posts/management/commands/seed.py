@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+
+from posts import seeding
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет рабочую базу синтетическими пользователями, группами, '
+        'постами, комментариями и подписками со степенными '
+        'распределениями. Одинаковый --seed даёт одинаковые данные.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument(
+            '--users', type=int,
+            help='По умолчанию — один пользователь на 100 постов.',
+        )
+        parser.add_argument(
+            '--groups', type=int,
+            help='По умолчанию — одна группа на 5000 постов.',
+        )
+        parser.add_argument(
+            '--comments', type=int,
+            help='По умолчанию — половина числа постов.',
+        )
+        parser.add_argument(
+            '--follows-per-user', type=int, default=5,
+            help='Среднее число подписок; распределено по Парето.',
+        )
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Показатель Ципфа: чем больше, тем сильнее перекос '
+                 'в сторону популярных авторов, групп и постов.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        created = seeding.seed_dataset(
+            options['posts'],
+            users=options['users'],
+            groups=options['groups'],
+            comments=options['comments'],
+            follows_per_user=options['follows_per_user'],
+            seed=options['seed'],
+            skew=options['skew'],
+        )
+        summary = ', '.join(
+            f'{name}: {count}' for name, count in created.items()
+        )
+        self.stdout.write(self.style.SUCCESS(f'Создано — {summary}'))
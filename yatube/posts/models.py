@@ -1,11 +1,33 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from core.models import BaseModel
 
 User = get_user_model()
 
 
-class Group(models.Model):
+class CountersMixin:
+    """Не даёт обычному save() перезаписать счётчики устаревшим значением.
+
+    Счётчики меняются только атомарным UPDATE из posts.counters, поэтому
+    при изменении записи они исключаются из сохраняемых полей.
+    """
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (
+            not self._state.adding
+            and kwargs.get('update_fields') is None
+            and not kwargs.get('force_insert')
+        ):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+class Group(CountersMixin, models.Model):
     title = models.CharField(
         max_length=200,
         verbose_name="Заголовок группы",
@@ -20,12 +42,20 @@ class Group(models.Model):
         verbose_name='Описание группы',
         help_text='Заполните описание группы'
     )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число постов',
+        help_text='Счётчик постов группы, обновляется автоматически'
+    )
+
+    counter_fields = ('posts_count',)
 
     def __str__(self):
         return self.title
 
 
-class Post(BaseModel):
+class Post(CountersMixin, BaseModel):
     text = models.TextField(
         verbose_name="Текст статьи",
         help_text='Введите текст поста'
@@ -35,13 +65,15 @@ class Post(BaseModel):
         on_delete=models.CASCADE,
         related_name='posts',
         verbose_name='Автор',
-        help_text='Автор поста, известен при аутентификации пользователя'
+        help_text='Автор поста, известен при аутентификации пользователя',
+        db_index=False
     )
     group = models.ForeignKey(
         Group,
         blank=True,
         null=True,
         on_delete=models.SET_NULL,
+        db_index=False,
         related_name='posts',
         verbose_name="Группа",
         help_text=(
@@ -55,15 +87,57 @@ class Post(BaseModel):
         blank=True,
         null=True
     )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения',
+        help_text='Меняется при любом изменении поста или его карточки'
+    )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число комментариев',
+        help_text='Счётчик комментариев, обновляется автоматически'
+    )
+
+    counter_fields = ('comments_count',)
 
     class Meta:
-        ordering = ('-created',)
+        ordering = ('-created', '-pk')
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        # Индексы повторяют ленты из posts.views: главная, группа,
+        # профиль. Одиночные индексы внешних ключей не нужны — они
+        # являются префиксами составных.
+        indexes = [
+            models.Index(fields=['created'], name='post_created_idx'),
+            models.Index(
+                fields=['author', 'created'],
+                name='post_author_created_idx'
+            ),
+            models.Index(
+                fields=['group', 'created'],
+                name='post_group_created_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Группа на момент загрузки: при смене группы нужно поправить
+        # счётчики обеих групп без повторного чтения поста.
+        if 'group_id' in instance.__dict__:
+            instance._loaded_group_id = instance.group_id
+        return instance
+
+    @transaction.atomic
+    def save(self, *args, **kwargs):
+        # Счётчики обновляются в post_save и должны попасть
+        # в ту же транзакцию, что и сама запись.
+        super().save(*args, **kwargs)
+
 
 class Comment(BaseModel):
     post = models.ForeignKey(
@@ -71,7 +145,8 @@ class Comment(BaseModel):
         on_delete=models.CASCADE,
         related_name='comments',
         verbose_name='Пост',
-        help_text='Комментарий оставляется под постами'
+        help_text='Комментарий оставляется под постами',
+        db_index=False
     )
     author = models.ForeignKey(
         User,
@@ -86,13 +161,23 @@ class Comment(BaseModel):
     )
 
     class Meta:
-        ordering = ('-created',)
+        ordering = ('-created', '-pk')
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=['post', 'created'],
+                name='comment_post_created_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    @transaction.atomic
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -120,3 +205,121 @@ class Follow(models.Model):
 
     def __str__(self):
         return f"{self.user.username} - {self.author.username}"
+
+    @transaction.atomic
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+
+
+class UserStats(models.Model):
+    """Денормализованные счётчики пользователя."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь',
+        help_text='Пользователь, которому принадлежат счётчики'
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число постов',
+        help_text='Сколько постов написал пользователь'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число подписчиков',
+        help_text='Сколько пользователей подписано на автора'
+    )
+    following_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число подписок',
+        help_text='На скольких авторов подписан пользователь'
+    )
+
+    class Meta:
+        verbose_name = 'Счётчики пользователя'
+        verbose_name_plural = 'Счётчики пользователей'
+
+    def __str__(self):
+        return f'{self.user_id}: {self.posts_count}'
+
+
+class TimelineEntry(models.Model):
+    """Материализованная лента подписок: пост в ленте пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель',
+        help_text='Пользователь, в чью ленту попал пост',
+        db_index=False
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+        help_text='Пост автора, на которого подписан читатель'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор',
+        help_text='Автор поста, нужен для чистки ленты при отписке'
+    )
+    created = models.DateTimeField(
+        verbose_name='Дата создания поста',
+        help_text='Копия даты создания поста для сортировки ленты'
+    )
+
+    class Meta:
+        ordering = ('-created', '-post_id')
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique timeline entry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', 'created', 'post'],
+                name='timeline_user_created_idx'
+            ),
+            models.Index(
+                fields=['user', 'author'],
+                name='timeline_user_author_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} - {self.post_id}'
+
+
+class ImportedPost(models.Model):
+    """Пост из файла ``import_posts``: его id в исходной базе и здесь.
+
+    Нужен комментариям, которые ссылаются на посты по исходному id,
+    в том числе после продолжения загрузки с контрольной точки.
+    Записи живут, пока идёт загрузка.
+    """
+    source_id = models.BigIntegerField(
+        primary_key=True,
+        verbose_name='id в исходной базе'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Пост'
+    )
+
+    class Meta:
+        verbose_name = 'Загруженный пост'
+        verbose_name_plural = 'Загруженные посты'
+
+    def __str__(self):
+        return f'{self.source_id} → {self.post_id}'
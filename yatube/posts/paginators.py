@@ -0,0 +1,142 @@
+import base64
+import binascii
+from typing import Optional, Tuple
+
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.db.models.query import QuerySet
+from django.utils.dateparse import parse_datetime
+
+NEXT: str = 'n'
+PREVIOUS: str = 'p'
+
+
+class CursorPaginator(Paginator):
+    """Keyset (seek) пагинатор по убыванию пары ключей.
+
+    По умолчанию ключ — (created, pk), что совпадает с порядком лент.
+    Последний ключ обязан быть уникальным, чтобы порядок был строгим.
+
+    Отдаёт обычные ``Page``: общее число записей неизвестно без COUNT(*),
+    поэтому ``count`` равен None, а ``num_pages`` описывает только «окно»
+    вокруг текущей страницы (есть ли предыдущая и следующая); от него же
+    считаются ``page_range`` и ``start_index``/``end_index`` страницы.
+    Курсоры соседних страниц лежат в ``page.previous_cursor`` и
+    ``page.next_cursor``. Номеров страниц нет: ``page`` и ``get_page``
+    отдают первую страницу.
+    """
+    is_cursor = True
+
+    def __init__(
+        self,
+        object_list: QuerySet,
+        per_page: int,
+        keys: Tuple[str, str] = ('created', 'pk'),
+    ):
+        super().__init__(object_list, per_page)
+        self.keys = keys
+        self._num_pages = 1
+
+    @property
+    def count(self):
+        return None
+
+    @property
+    def num_pages(self):
+        return self._num_pages
+
+    def encode_cursor(self, direction: str, obj) -> str:
+        # Строки из .values() — словари, объекты моделей — атрибуты.
+        if isinstance(obj, dict):
+            created, pk = (obj[key] for key in self.keys)
+        else:
+            created, pk = (getattr(obj, key) for key in self.keys)
+        raw = f'{direction}|{created.isoformat()}|{pk}'
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor: str) -> Optional[tuple]:
+        try:
+            raw = base64.urlsafe_b64decode(
+                cursor + '=' * (-len(cursor) % 4)
+            ).decode()
+            direction, created, pk = raw.split('|')
+            created = parse_datetime(created)
+            pk = int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            return None
+        if direction not in (NEXT, PREVIOUS) or created is None:
+            return None
+        return direction, created, pk
+
+    def _seek(self, direction: str, created, pk) -> QuerySet:
+        first, second = self.keys
+        if direction == NEXT:
+            strict, loose, order = 'lt', 'lte', '-'
+        else:
+            strict, loose, order = 'gt', 'gte', ''
+        # Нестрогое условие на первый ключ вынесено отдельно, чтобы база
+        # могла сделать поиск по индексу, а не сканировать его с начала.
+        condition = (
+            Q(**{f'{first}__{loose}': created})
+            & (
+                Q(**{f'{first}__{strict}': created})
+                | Q(**{f'{second}__{strict}': pk})
+            )
+        )
+        return self.object_list.filter(condition).order_by(
+            f'{order}{first}', f'{order}{second}'
+        )
+
+    def page(self, number) -> Page:
+        return self.first_page()
+
+    def get_page(self, number) -> Page:
+        return self.first_page()
+
+    def _build_page(
+        self, rows, has_next: bool, has_previous: bool
+    ) -> Page:
+        number = 2 if has_previous else 1
+        self._num_pages = number + 1 if has_next else number
+        page = Page(rows, number, self)
+        page.next_cursor = (
+            self.encode_cursor(NEXT, rows[-1]) if has_next else None
+        )
+        page.previous_cursor = (
+            self.encode_cursor(PREVIOUS, rows[0]) if has_previous else None
+        )
+        return page
+
+    def first_page(self) -> Page:
+        first, second = self.keys
+        rows = list(
+            self.object_list.order_by(f'-{first}', f'-{second}')[
+                :self.per_page + 1
+            ]
+        )
+        return self._build_page(
+            rows[:self.per_page],
+            has_next=len(rows) > self.per_page,
+            has_previous=False,
+        )
+
+    def get_cursor_page(self, cursor: Optional[str]) -> Page:
+        """Возвращает страницу по курсору.
+
+        Битый курсор, как и курсор, ведущий в пустоту или к началу
+        ленты, отдаёт первую страницу — по аналогии с Paginator.get_page.
+        """
+        decoded = self.decode_cursor(cursor) if cursor else None
+        if decoded is None:
+            return self.first_page()
+
+        direction, created, pk = decoded
+        rows = list(self._seek(direction, created, pk)[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not rows or (direction == PREVIOUS and not has_more):
+            return self.first_page()
+        if direction == NEXT:
+            return self._build_page(rows, has_next=has_more, has_previous=True)
+        rows.reverse()
+        return self._build_page(rows, has_next=True, has_previous=True)
@@ -0,0 +1,189 @@
+"""Полнотекстовый поиск по постам и комментариям.
+
+Тексты лежат в виртуальной таблице SQLite FTS5 ``posts_search``,
+которую сигналы держат в актуальном состоянии, в том числе при
+``loaddata``. ``bulk_create`` сигналы обходит, поэтому ``import_posts``
+и ``seed`` в конце пересобирают индекс через ``rebuild``. Пост и комментарий
+различаются по ``rowid``: у поста это ``pk * 2``, у комментария —
+``pk * 2 + 1``; так запись находится и удаляется без скана таблицы.
+На других СУБД поиск откатывается к ``icontains`` по тексту постов.
+"""
+import re
+from typing import List, NamedTuple, Optional
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Comment, Post
+
+TABLE: str = 'posts_search'
+MAX_TERMS: int = 8
+SNIPPET_TOKENS: int = 24
+# Маркеры подсветки — управляющие символы, которых нет в тексте:
+# snippet() возвращает сырой текст, экранируем его уже после.
+MARK_START: str = '\x02'
+MARK_END: str = '\x03'
+
+
+class SearchHit(NamedTuple):
+    post: Post
+    comment: Optional[Comment]
+    snippet: str
+
+
+def is_available() -> bool:
+    return connection.vendor == 'sqlite'
+
+
+def to_match(query: str) -> str:
+    """Превращает ввод пользователя в безопасное выражение MATCH.
+
+    Каждое слово ищется по префиксу, все слова должны встретиться.
+    """
+    terms = re.findall(r'\w+', query.lower())[:MAX_TERMS]
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def _rowid(instance) -> int:
+    return instance.pk * 2 + (1 if isinstance(instance, Comment) else 0)
+
+
+def index(instance) -> None:
+    """Добавляет или обновляет пост или комментарий в индексе."""
+    if not is_available():
+        return
+    post_id = instance.post_id if isinstance(instance, Comment) else (
+        instance.pk
+    )
+    with connection.cursor() as cursor:
+        # FTS5 сам удаляет старые токены записи при REPLACE по rowid.
+        cursor.execute(
+            f'INSERT OR REPLACE INTO {TABLE} (rowid, text, post_id) '
+            f'VALUES (%s, %s, %s)',
+            [_rowid(instance), instance.text, post_id],
+        )
+
+
+def remove(instance) -> None:
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {TABLE} WHERE rowid = %s', [_rowid(instance)]
+        )
+
+
+def rebuild() -> None:
+    """Заполняет индекс с нуля, например после bulk-загрузки."""
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, text, post_id) '
+            f'SELECT id * 2, text, id FROM {Post._meta.db_table}'
+        )
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, text, post_id) '
+            f'SELECT id * 2 + 1, text, post_id FROM {Comment._meta.db_table}'
+        )
+        cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+
+
+def matching(queryset, query: str):
+    """Сужает queryset постов или комментариев до найденных в индексе."""
+    match = to_match(query)
+    if not match:
+        return queryset.none()
+    if not is_available():
+        return queryset.filter(text__icontains=query)
+    parity = 1 if queryset.model is Comment else 0
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid / 2 FROM {TABLE} '
+        f'WHERE {TABLE} MATCH %s AND (rowid & 1) = {parity}',
+        [match],
+    ))
+
+
+def _highlight(raw: str) -> str:
+    return mark_safe(
+        escape(raw)
+        .replace(MARK_START, '<mark>')
+        .replace(MARK_END, '</mark>')
+    )
+
+
+class SearchResults:
+    """Ленивая выдача поиска, упорядоченная по релевантности (bm25).
+
+    Поддерживает ``count()`` и срезы, поэтому её можно отдать обычному
+    ``Paginator``: запрашивается только нужная страница.
+    """
+
+    def __init__(self, query: str):
+        self.query = query
+        self.match = to_match(query)
+        self._count = None
+
+    def count(self) -> int:
+        if self._count is None:
+            if not self.match:
+                self._count = 0
+            elif not is_available():
+                self._count = matching(Post.objects, self.query).count()
+            else:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f'SELECT count(*) FROM {TABLE} '
+                        f'WHERE {TABLE} MATCH %s',
+                        [self.match],
+                    )
+                    self._count = cursor.fetchone()[0]
+        return self._count
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __getitem__(self, item: slice) -> List[SearchHit]:
+        if not isinstance(item, slice):
+            raise TypeError('SearchResults поддерживает только срезы')
+        start = item.start or 0
+        stop = self.count() if item.stop is None else item.stop
+        if not self.match or stop <= start:
+            return []
+        if not is_available():
+            posts = matching(
+                Post.objects.select_related('author', 'group'), self.query
+            )[start:stop]
+            return [
+                SearchHit(post, None, escape(post.text)) for post in posts
+            ]
+        return self._fetch(start, stop - start)
+
+    def _fetch(self, offset: int, limit: int) -> List[SearchHit]:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid, post_id, snippet({TABLE}, 0, %s, %s, %s, %s) '
+                f'FROM {TABLE} WHERE {TABLE} MATCH %s '
+                f'ORDER BY rank LIMIT %s OFFSET %s',
+                [MARK_START, MARK_END, '…', SNIPPET_TOKENS,
+                 self.match, limit, offset],
+            )
+            rows = cursor.fetchall()
+
+        posts = Post.objects.select_related('author', 'group').in_bulk(
+            {post_id for _, post_id, _ in rows}
+        )
+        comments = Comment.objects.select_related('author').in_bulk(
+            [rowid // 2 for rowid, _, _ in rows if rowid & 1]
+        )
+        hits = []
+        for rowid, post_id, snippet in rows:
+            comment = comments.get(rowid // 2) if rowid & 1 else None
+            post = posts.get(post_id)
+            if post is None or (rowid & 1 and comment is None):
+                continue
+            hits.append(SearchHit(post, comment, _highlight(snippet)))
+        return hits
@@ -0,0 +1,212 @@
+"""Наполнение базы синтетическими данными для бенчмарков.
+
+Группы генерируются mixer'ом (как в фикстурах тестов), тексты и имена
+— Faker'ом; всё пишется пачками через ``bulk_create`` в одной
+транзакции без промежуточных списков. Новые строки каждой таблицы
+получают ``pk`` подряд, поэтому их id — это ``range``, а авторы и посты
+выбираются по рангу Ципфа формулой, без списков весов: память не
+растёт с числом строк, и набор годится для миллионов постов. Сигналы
+при этом не срабатывают, и счётчики, ленты и поисковый индекс
+пересобираются в конце. При одинаковом ``seed`` получается одинаковый
+набор данных.
+"""
+import random
+from datetime import timedelta
+from itertools import accumulate, islice
+from math import gcd
+from typing import Dict, Iterable, List
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from core.db import bulk_insert
+
+from . import counters, search, timeline
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+BATCH_SIZE: int = 2000
+TEXTS_POOL: int = 500
+
+
+def insert_with_created(model, objects: List) -> List:
+    """Вставляет объекты с заранее заданным ``created``.
+
+    ``auto_now_add`` перезаписывает дату при вставке, в том числе
+    в ``bulk_create``, поэтому заданные даты дописываются следом одним
+    ``bulk_update`` по ``pk`` вставленных строк. Вызывать в транзакции.
+    """
+    created = [obj.created for obj in objects]
+    bulk_insert(model, objects)
+    for obj, value in zip(objects, created):
+        obj.created = value
+    model.objects.bulk_update(objects, ['created'], batch_size=BATCH_SIZE)
+    return objects
+
+
+def _bulk_create(model, objects: Iterable, created: bool = False) -> range:
+    """Пишет объекты пачками и возвращает ``pk`` вставленных строк.
+
+    В транзакции ``seed_dataset`` строки получают ``pk`` подряд.
+    """
+    insert = insert_with_created if created else bulk_insert
+    objects = iter(objects)
+    first = last = None
+    while True:
+        batch = list(islice(objects, BATCH_SIZE))
+        if not batch:
+            break
+        insert(model, batch)
+        first = batch[0].pk if first is None else first
+        last = batch[-1].pk
+    return range(first, last + 1) if first is not None else range(0)
+
+
+def zipf_weights(count: int, skew: float) -> List[float]:
+    """Накопленные веса закона Ципфа: k-й по популярности — ``1/k**skew``.
+
+    Годятся для ``Random.choices(cum_weights=...)``: выбор за O(log n)
+    без пересчёта весов на каждый вызов.
+    """
+    return list(accumulate(1 / rank ** skew for rank in range(1, count + 1)))
+
+
+def zipf_rank(rnd: random.Random, count: int, skew: float) -> int:
+    """Ранг от 0 до ``count - 1``, распределённый примерно по Ципфу.
+
+    Обратная функция распределения непрерывного степенного закона:
+    O(1) по памяти и времени, в отличие от ``zipf_weights``.
+    """
+    u = rnd.random()
+    if skew == 1:
+        rank = (count + 1) ** u
+    else:
+        power = 1 - skew
+        rank = (1 - u * (1 - (count + 1) ** power)) ** (1 / power)
+    return min(int(rank), count) - 1
+
+
+def follow_degree(rnd: random.Random, mean: float, limit: int) -> int:
+    """Число подписок пользователя по Парето: у большинства их мало,
+    у единиц — на порядки больше среднего."""
+    # У Парето с alpha=2 среднее равно 2, отсюда деление пополам.
+    return min(limit, int(mean / 2 * rnd.paretovariate(2)))
+
+
+@transaction.atomic
+def seed_dataset(
+    posts: int,
+    users: int = None,
+    groups: int = None,
+    comments: int = None,
+    follows_per_user: int = 5,
+    seed: int = 0,
+    skew: float = 1.1,
+) -> Dict[str, int]:
+    """Добавляет в базу посты, авторов, группы, комментарии и подписки.
+
+    Недостающие размеры выводятся из числа постов. Авторство постов,
+    комментарии под постами, популярность групп и авторов среди
+    подписчиков распределены по Ципфу с показателем ``skew``: несколько
+    тяжёлых авторов и много почти пустых профилей, как на живом
+    сервисе. Возвращает фактическое число созданных записей каждого вида.
+    """
+    users = users or max(10, posts // 100)
+    groups = groups or max(3, posts // 5000)
+    comments = posts // 2 if comments is None else comments
+
+    rnd = random.Random(seed)
+    random.seed(seed)
+    mixer = Mixer(commit=False)
+    mixer.faker.seed_instance(seed)
+    texts = [mixer.faker.text(max_nb_chars=300) for _ in range(TEXTS_POOL)]
+    names = [
+        (mixer.faker.first_name(), mixer.faker.last_name())
+        for _ in range(TEXTS_POOL)
+    ]
+    prefix = f'seed{seed}x{rnd.randrange(10 ** 6)}'
+
+    # Пользователей может быть миллионы: mixer для них слишком медленный,
+    # имена берутся из заранее сгенерированного пула.
+    password = make_password(None)
+    joined = timezone.now()
+    user_ids = _bulk_create(User, (
+        User(
+            username=f'{prefix}u{number}',
+            first_name=first_name,
+            last_name=last_name,
+            password=password,
+            date_joined=joined,
+        )
+        for number, (first_name, last_name) in enumerate(
+            rnd.choice(names) for _ in range(users)
+        )
+    ))
+    _bulk_create(
+        UserStats, (UserStats(user_id=user_id) for user_id in user_ids)
+    )
+    group_ids = list(_bulk_create(Group, mixer.cycle(groups).blend(
+        Group, slug=mixer.sequence(prefix + 'g{0}')
+    )))
+
+    # Ранги популярности перемешаны, чтобы тяжёлые авторы не шли
+    # подряд по pk: шаг, взаимно простой с числом пользователей,
+    # переставляет их без списка. Треть постов — вне групп.
+    stride = rnd.randrange(1, users + 1)
+    while gcd(stride, users) != 1:
+        stride += 1
+    offset = rnd.randrange(users)
+
+    def author() -> int:
+        rank = zipf_rank(rnd, users, skew)
+        return user_ids[(rank * stride + offset) % users]
+
+    group_choices = rnd.sample(group_ids, len(group_ids)) + [None]
+    group_weights = zipf_weights(len(group_ids), skew)
+    group_weights.append(group_weights[-1] * 1.5)
+
+    # Посты равномерно растянуты на год назад: так индексы по дате
+    # ведут себя как на живых данных, а не на одной временной метке.
+    now = timezone.now()
+    step = timedelta(days=365) / max(posts, 1)
+    post_ids = _bulk_create(Post, (
+        Post(
+            author_id=author(),
+            group_id=rnd.choices(group_choices, cum_weights=group_weights)[0],
+            text=rnd.choice(texts),
+            created=now - step * (posts - number),
+        )
+        for number in range(posts)
+    ), created=True)
+    # Обсуждают в основном свежие посты: ранг 0 — последний пост.
+    _bulk_create(Comment, (
+        Comment(
+            post_id=post_ids[-1 - zipf_rank(rnd, len(post_ids), skew)],
+            author_id=rnd.choice(user_ids),
+            text=rnd.choice(texts)[:200],
+            created=now - step * rnd.randrange(max(posts, 1)),
+        )
+        for _ in range(comments if post_ids else 0)
+    ), created=True)
+
+    def follows():
+        for user_id in user_ids:
+            degree = follow_degree(rnd, follows_per_user, users - 1)
+            followed = {author() for _ in range(degree)}
+            followed.discard(user_id)
+            for author_id in sorted(followed):
+                yield Follow(user_id=user_id, author_id=author_id)
+
+    follow_ids = _bulk_create(Follow, follows())
+
+    counters.recount_all()
+    timeline.rebuild()
+    search.rebuild()
+    return {
+        'users': users,
+        'groups': groups,
+        'posts': posts,
+        'comments': comments if post_ids else 0,
+        'follows': len(follow_ids),
+    }
@@ -0,0 +1,232 @@
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+
+from core.cache import bump_version
+from . import cards, counters, groups, search, timeline, versions
+from .models import Comment, Follow, Group, Post, User, UserStats
+from .utils import INDEX_CACHE_SCOPE
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.fan_out_post(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline(sender, instance, **kwargs):
+    timeline.prune(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=User)
+def invalidate_index(sender, raw=False, **kwargs):
+    if not raw:
+        bump_version(INDEX_CACHE_SCOPE)
+
+
+@receiver(post_save, sender=User)
+def invalidate_index_on_user_change(sender, update_fields=None, raw=False,
+                                    **kwargs):
+    # Вход пользователя обновляет только last_login — на ленту не влияет.
+    if not raw and update_fields != frozenset({'last_login'}):
+        bump_version(INDEX_CACHE_SCOPE)
+
+
+@receiver(post_save, sender=User)
+def create_user_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_group(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        instance._loaded_group_id = None
+    elif not hasattr(instance, '_loaded_group_id'):
+        # Пост собран не из базы или без поля group — читаем группу.
+        instance._loaded_group_id = Post.objects.filter(
+            pk=instance.pk
+        ).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def bump_saved_post_versions(sender, instance, raw=False, **kwargs):
+    # Подключён раньше count_saved_post: тот перезаписывает
+    # _loaded_group_id, а здесь нужна и прежняя группа поста.
+    if not raw:
+        versions.bump_post(
+            instance.pk,
+            instance.author_id,
+            [instance.group_id, instance._loaded_group_id],
+        )
+
+
+@receiver(post_delete, sender=Post)
+def bump_deleted_post_versions(sender, instance, **kwargs):
+    versions.bump_post(instance.pk, instance.author_id, [instance.group_id])
+
+
+@receiver(post_save, sender=Post)
+def invalidate_groups_on_saved_post(sender, instance, created, raw=False,
+                                    **kwargs):
+    # Подключён раньше count_saved_post по той же причине, что и
+    # bump_saved_post_versions. Реестр хранит число постов групп.
+    if raw:
+        return
+    moved = created or instance._loaded_group_id != instance.group_id
+    if moved and (instance.group_id or instance._loaded_group_id):
+        groups.invalidate()
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_groups_on_deleted_post(sender, instance, **kwargs):
+    if instance.group_id:
+        groups.invalidate()
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.shift_user(instance.author_id, posts_count=1)
+        counters.shift_group(instance.group_id, 1)
+    elif instance._loaded_group_id != instance.group_id:
+        counters.shift_group(instance._loaded_group_id, -1)
+        counters.shift_group(instance.group_id, 1)
+    instance._loaded_group_id = instance.group_id
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    counters.shift_user(instance.author_id, posts_count=-1)
+    counters.shift_group(instance.group_id, -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.shift_post(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    counters.shift_post(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def count_saved_follow(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.shift_user(instance.author_id, followers_count=1)
+        counters.shift_user(instance.user_id, following_count=1)
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    counters.shift_user(instance.author_id, followers_count=-1)
+    counters.shift_user(instance.user_id, following_count=-1)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Comment)
+def index_for_search(sender, instance, update_fields=None, raw=False,
+                     **kwargs):
+    # raw-сохранения (loaddata) тоже индексируются: запись индекса
+    # зависит только от самой строки, а без неё поиск молча её пропустит.
+    if raw or update_fields is None or 'text' in update_fields:
+        search.index(instance)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+def remove_from_search(sender, instance, **kwargs):
+    search.remove(instance)
+
+
+@receiver(post_save, sender=Group)
+def refresh_group_cards(sender, instance, created, raw=False, **kwargs):
+    # В карточке постов есть название и slug группы.
+    if not created and not raw:
+        cards.touch(Post.objects.filter(group=instance))
+        versions.bump_group_info(instance.pk)
+
+
+@receiver(pre_delete, sender=Group)
+def refresh_cards_of_deleted_group(sender, instance, **kwargs):
+    # Посты останутся без группы через UPDATE без сигналов.
+    cards.touch(Post.objects.filter(group=instance))
+    versions.bump_group_info(instance.pk)
+
+
+@receiver(pre_save, sender=User)
+def remember_username(sender, instance, raw=False, update_fields=None,
+                      **kwargs):
+    instance._loaded_username = None
+    if raw or instance._state.adding:
+        return
+    if update_fields is None or 'username' in update_fields:
+        instance._loaded_username = User.objects.filter(
+            pk=instance.pk
+        ).values_list('username', flat=True).first()
+
+
+@receiver(post_save, sender=User)
+def refresh_author_cards(sender, instance, **kwargs):
+    loaded = getattr(instance, '_loaded_username', None)
+    if loaded is not None and loaded != instance.username:
+        cards.touch(Post.objects.filter(author=instance))
+        # Имя автора есть в карточках его постов во всех группах.
+        versions.bump_all_groups()
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def bump_comment_versions(sender, instance, raw=False, **kwargs):
+    if not raw:
+        versions.bump_comment(instance)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def bump_follow_versions(sender, instance, raw=False, **kwargs):
+    # Меняются счётчики подписок обоих, кнопка в профиле автора
+    # и кнопки подписки в лентах читателя.
+    if not raw:
+        bump_version(
+            versions.author_scope(instance.author_id),
+            versions.author_scope(instance.user_id),
+            versions.viewer_scope(instance.user_id),
+        )
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def bump_group_version(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump_version(versions.group_scope(instance.pk))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_groups(sender, **kwargs):
+    # И при загрузке фикстур: иначе новые группы отдавали бы 404.
+    groups.invalidate()
+
+
+@receiver(post_save, sender=User)
+def bump_author_version(sender, instance, update_fields=None, raw=False,
+                        **kwargs):
+    if not raw and update_fields != frozenset({'last_login'}):
+        bump_version(versions.author_scope(instance.pk))
@@ -0,0 +1,13 @@
+from jobs.queue import task
+from . import thumbnails
+from .models import Post
+
+
+@task()
+def build_thumbnail(image_name: str, post_id: int) -> None:
+    # Пост могли удалить, пока задача ждала в очереди, а повтор после
+    # сбоя воркера не строит миниатюру заново.
+    if not Post.objects.filter(pk=post_id).exists():
+        return
+    if thumbnails.get_ready_thumbnail(image_name) is None:
+        thumbnails.generate_now(image_name, post_id)
@@ -0,0 +1,11 @@
+from django import template
+
+from posts.thumbnails import get_ready_thumbnail
+
+register = template.Library()
+
+
+@register.simple_tag
+def ready_thumbnail(image):
+    """Готовая миниатюра картинки поста или None, если она ещё строится."""
+    return get_ready_thumbnail(image)
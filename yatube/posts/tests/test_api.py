@@ -0,0 +1,119 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+from ..utils import CNT_POSTS_IN_PAGE
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='uniqueslug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        for i in range(CNT_POSTS_IN_PAGE + 3):
+            cls.post = Post.objects.create(
+                author=cls.user,
+                group=cls.group,
+                text=f'Тестовый пост {i}',
+            )
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий'
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(ApiTests.reader)
+        cache.clear()
+
+    def test_group_feed_uses_group_registry(self):
+        """API берёт группу из того же кэша, что и HTML-страницы"""
+        url = reverse('api:group_posts', kwargs={'slug': 'uniqueslug'})
+        self.guest_client.get(reverse(
+            'posts:group_list', kwargs={'slug': 'uniqueslug'}
+        ))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [q for q in queries if 'FROM "posts_group"' in q['sql']], []
+        )
+
+    def test_feeds_are_paginated_by_cursor(self):
+        """Все ленты API отдают страницу и ссылку на следующую"""
+        urls = [
+            reverse('api:posts'),
+            reverse('api:group_posts', kwargs={'slug': 'uniqueslug'}),
+            reverse('api:profile_posts', kwargs={'username': 'auth'}),
+            reverse('api:follow'),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                data = self.reader_client.get(url).json()
+                self.assertEqual(len(data['results']), CNT_POSTS_IN_PAGE)
+                self.assertEqual(
+                    data['results'][0]['text'],
+                    f'Тестовый пост {CNT_POSTS_IN_PAGE + 2}'
+                )
+                self.assertEqual(data['results'][0]['author'], 'auth')
+                self.assertIsNone(data['previous'])
+                second = self.reader_client.get(data['next']).json()
+                self.assertEqual(len(second['results']), 3)
+                self.assertIsNone(second['next'])
+                self.assertEqual(
+                    second['results'][-1]['text'], 'Тестовый пост 0'
+                )
+
+    def test_fields_limit_selected_columns(self):
+        """?fields= сужает и ответ, и SELECT"""
+        url = reverse('api:posts')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(url, {'fields': 'id,group'})
+        item = response.json()['results'][0]
+        self.assertEqual(set(item), {'id', 'group'})
+        self.assertEqual(item, {'id': ApiTests.post.pk, 'group': 'uniqueslug'})
+        select = queries[-1]['sql']
+        self.assertNotIn('"text"', select)
+        self.assertIn('"posts_group"."slug"', select)
+        next_url = response.json()['next']
+        self.assertIn('fields=id%2Cgroup', next_url)
+
+    def test_unknown_field_is_rejected(self):
+        response = self.guest_client.get(
+            reverse('api:posts'), {'fields': 'id,password'}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', response.json()['error'])
+
+    def test_comments_and_errors(self):
+        data = self.guest_client.get(reverse(
+            'api:post_comments', kwargs={'post_id': ApiTests.post.pk}
+        )).json()
+        self.assertEqual(
+            data['results'][0]['post'], ApiTests.post.pk
+        )
+        self.assertEqual(data['results'][0]['author'], 'reader')
+        missing = [
+            reverse('api:post_comments', kwargs={'post_id': 10 ** 6}),
+            reverse('api:group_posts', kwargs={'slug': 'missing'}),
+            reverse('api:profile_posts', kwargs={'username': 'missing'}),
+        ]
+        for url in missing:
+            with self.subTest(url=url):
+                self.assertEqual(self.guest_client.get(url).status_code, 404)
+        self.assertEqual(
+            self.guest_client.get(reverse('api:follow')).status_code, 401
+        )
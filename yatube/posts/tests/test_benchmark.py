@@ -0,0 +1,92 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import Count, F
+from django.test import TestCase
+from django.utils import timezone
+
+from .. import benchmark, seeding
+from ..models import Comment, Follow, Group, Post, TimelineEntry, User
+
+
+class SeedingTests(TestCase):
+    def test_seed_dataset_keeps_counters_and_timeline(self):
+        """Синтетические данные согласованы со счётчиками и лентами"""
+        dataset = seeding.seed_dataset(60, comments=40, seed=1)
+        self.assertEqual(Post.objects.count(), dataset['posts'])
+        self.assertEqual(Comment.objects.count(), dataset['comments'])
+        self.assertEqual(Follow.objects.count(), dataset['follows'])
+        self.assertEqual(
+            sum(Group.objects.values_list('posts_count', flat=True)),
+            Post.objects.exclude(group=None).count()
+        )
+        expected = sum(
+            Post.objects.filter(author_id=author_id).count()
+            for author_id in Follow.objects.values_list('author', flat=True)
+        )
+        self.assertEqual(TimelineEntry.objects.count(), expected)
+        self.assertEqual(
+            Post.objects.values('created').distinct().count(), 60
+        )
+
+    def test_seed_dataset_keeps_auto_now_add(self):
+        """Заданные даты постов не отключают auto_now_add у модели"""
+        seeding.seed_dataset(20, seed=5)
+        self.assertLess(
+            Post.objects.order_by('created').first().created,
+            timezone.now() - timedelta(days=300),
+        )
+        post = Post.objects.create(
+            author=User.objects.first(), text='Новый пост'
+        )
+        self.assertIsNotNone(post.created)
+
+    def test_seed_dataset_is_deterministic(self):
+        """Одинаковый seed даёт одинаковые данные"""
+        seeding.seed_dataset(20, seed=7)
+        first = list(Post.objects.order_by('pk').values_list(
+            'text', 'author__username'
+        ))
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        seeding.seed_dataset(20, seed=7)
+        second = list(Post.objects.order_by('pk').values_list(
+            'text', 'author__username'
+        ))
+        self.assertEqual(first, second)
+
+    def test_seed_dataset_is_skewed(self):
+        """Посты и подписчики сосредоточены у немногих авторов"""
+        seeding.seed_dataset(2000, users=100, follows_per_user=10, seed=3)
+        posts = sorted(
+            User.objects.annotate(total=Count('posts'))
+            .values_list('total', flat=True),
+            reverse=True,
+        )
+        self.assertGreater(posts[0], 10 * posts[len(posts) // 2])
+        followers = sorted(
+            User.objects.annotate(total=Count('following'))
+            .values_list('total', flat=True),
+            reverse=True,
+        )
+        self.assertGreater(followers[0], 3 * followers[len(followers) // 2])
+        self.assertEqual(Follow.objects.filter(user=F('author')).count(), 0)
+
+    def test_seed_command(self):
+        out = StringIO()
+        call_command('seed', posts=50, seed=4, stdout=out)
+        self.assertEqual(Post.objects.count(), 50)
+        self.assertIn('posts: 50', out.getvalue())
+
+
+class BenchmarkTests(TestCase):
+    def test_run_views_measures_every_view(self):
+        """Замер возвращает запросы, процентили и память по каждому виду"""
+        seeding.seed_dataset(30, seed=2)
+        results = benchmark.run_views(repeat=2, warmup=0)
+        self.assertEqual(set(results), set(benchmark.VIEWS))
+        for result in results.values():
+            self.assertGreater(result['queries'], 0)
+            self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+            self.assertGreater(result['peak_kib'], 0)
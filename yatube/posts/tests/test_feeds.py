@@ -0,0 +1,95 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..feeds import FEED_SIZE
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='uniqueslug',
+            description='Тестовое описание',
+        )
+        for i in range(FEED_SIZE + 2):
+            cls.post = Post.objects.create(
+                author=cls.user,
+                group=cls.group,
+                text=f'Тестовый пост {i}',
+            )
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+        self.urls = [
+            reverse('posts:feed_rss'),
+            reverse('posts:feed_atom'),
+            reverse('posts:group_rss', kwargs={'slug': 'uniqueslug'}),
+            reverse('posts:group_atom', kwargs={'slug': 'uniqueslug'}),
+            reverse('posts:author_rss', kwargs={'username': 'auth'}),
+            reverse('posts:author_atom', kwargs={'username': 'auth'}),
+        ]
+
+    def test_feeds_list_latest_posts(self):
+        """Ленты отдают последние FEED_SIZE постов"""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                content = response.content.decode()
+                self.assertIn(f'Тестовый пост {FEED_SIZE + 1}', content)
+                self.assertNotIn('Тестовый пост 1<', content)
+                self.assertNotIn('Cookie', response.get('Vary', ''))
+
+    def test_unknown_group_and_author_return_404(self):
+        urls = [
+            reverse('posts:group_rss', kwargs={'slug': 'missing'}),
+            reverse('posts:author_atom', kwargs={'username': 'missing'}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 404)
+
+    def test_feeds_are_cached_until_new_post(self):
+        """Повторная лента берётся из кэша, новый пост её сбрасывает"""
+        for url in self.urls:
+            self.guest_client.get(url)
+        # Группа берётся из реестра групп, автору нужен поиск по URL.
+        for url, queries in zip(self.urls, (0, 0, 0, 0, 1, 1)):
+            with self.subTest(url=url), self.assertNumQueries(queries):
+                self.guest_client.get(url)
+        Post.objects.create(
+            author=FeedTests.user, group=FeedTests.group, text='Свежий пост'
+        )
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertIn('Свежий пост', response.content.decode())
+
+    def test_conditional_get_returns_304(self):
+        """Совпавший ETag даёт 304, после нового поста — снова 200"""
+        etags = {url: self.guest_client.get(url)['ETag'] for url in self.urls}
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 304)
+        Post.objects.create(
+            author=FeedTests.user, group=FeedTests.group, text='Свежий пост'
+        )
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
@@ -1,6 +1,9 @@
 import shutil
 import tempfile
 
+from .. import thumbnails
+from jobs import queue
+from jobs.models import Job
 from ..models import Group, Post, Comment, Follow
 from django.conf import settings
 from django.contrib.auth import get_user_model
@@ -228,6 +231,51 @@ class PostsCreateFormTests(TestCase):
             ).exists()
         )
 
+    def test_post_image_thumbnail_is_pregenerated(self):
+        """Пока миниатюры нет — заглушка, после генерации — картинка"""
+        post = Post.objects.create(
+            author=PostsCreateFormTests.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(
+                name='thumb.gif',
+                content=PostsCreateFormTests.small_gif,
+                content_type='image/gif'
+            ),
+        )
+        url = reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        response = self.guest_client.get(url)
+        self.assertContains(response, 'Изображение обрабатывается')
+
+        thumbnails.generate_now(post.image.name)
+        thumbnail = thumbnails.get_ready_thumbnail(post.image)
+        self.assertIsNotNone(thumbnail)
+        response = self.guest_client.get(url)
+        self.assertNotContains(response, 'Изображение обрабатывается')
+        self.assertContains(response, thumbnail.url)
+
+    def test_thumbnail_is_built_by_worker(self):
+        """Миниатюру новой картинки строит воркер очереди, а не запрос"""
+        self.author_client.post(
+            reverse('posts:post_create'),
+            data={
+                'text': 'Пост для воркера',
+                'image': SimpleUploadedFile(
+                    name='worker.gif',
+                    content=PostsCreateFormTests.small_gif,
+                    content_type='image/gif'
+                ),
+            },
+        )
+        post = Post.objects.get(text='Пост для воркера')
+        job = Job.objects.get(task='posts.tasks.build_thumbnail')
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertIsNone(thumbnails.get_ready_thumbnail(post.image))
+
+        self.assertEqual(queue.run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertIsNotNone(thumbnails.get_ready_thumbnail(post.image))
+
     def test_subscribe_and_unsubscribe_author(self):
         cnt_following = Follow.objects.count()
         response = self.reader_client.post(
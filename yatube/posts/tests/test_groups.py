@@ -0,0 +1,120 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.cache import get_version
+
+from .. import groups
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class GroupRegistryTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.quiet = Group.objects.create(
+            title='Тихая группа', slug='quiet', description='Мало постов'
+        )
+        cls.busy = Group.objects.create(
+            title='Активная группа', slug='busy', description='Много постов'
+        )
+        Post.objects.create(author=cls.user, group=cls.quiet, text='Пост')
+        for i in range(3):
+            Post.objects.create(
+                author=cls.user, group=cls.busy, text=f'Пост {i}'
+            )
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+
+    def group_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        return response, [
+            query for query in queries
+            if 'FROM "posts_group"' in query['sql']
+        ]
+
+    def test_directory_is_sorted_by_activity(self):
+        response = self.client.get(reverse('posts:group_index'))
+        self.assertEqual(
+            [group.slug for group in response.context['groups']],
+            ['busy', 'quiet']
+        )
+        self.assertContains(response, 'Всего постов: 3')
+
+    def test_group_metadata_is_read_once(self):
+        """Реестр читается одним запросом, дальше — только кэш"""
+        urls = (
+            reverse('posts:group_index'),
+            reverse('posts:group_list', kwargs={'slug': 'busy'}),
+            reverse('posts:group_list', kwargs={'slug': 'quiet'}),
+            reverse('posts:group_rss', kwargs={'slug': 'quiet'}),
+        )
+        _, first = self.group_queries(urls[0])
+        self.assertEqual(len(first), 1)
+        for url in urls[1:]:
+            with self.subTest(url=url):
+                response, queries = self.group_queries(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(queries, [])
+
+    def test_registry_follows_group_and_post_changes(self):
+        groups.registry()
+        Post.objects.create(
+            author=GroupRegistryTests.user,
+            group=GroupRegistryTests.quiet,
+            text='Новый пост',
+        )
+        self.assertEqual(groups.get('quiet').posts_count, 2)
+
+        post = Post.objects.filter(group=GroupRegistryTests.quiet).first()
+        post.group = GroupRegistryTests.busy
+        post.save()
+        self.assertEqual(groups.get('quiet').posts_count, 1)
+        self.assertEqual(groups.get('busy').posts_count, 4)
+
+        Group.objects.create(title='Новая', slug='new', description='')
+        response = self.client.get(
+            reverse('posts:group_list', kwargs={'slug': 'new'})
+        )
+        self.assertEqual(response.status_code, 200)
+
+        Group.objects.get(slug='new').delete()
+        response = self.client.get(
+            reverse('posts:group_list', kwargs={'slug': 'new'})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_registry_keeps_single_cache_entry(self):
+        """Смена версии перезаписывает реестр, а не добавляет ключ"""
+        for _ in range(3):
+            groups.registry()
+            groups.invalidate()
+        with CaptureQueriesContext(connection) as queries:
+            groups.registry()
+            groups.registry()
+        self.assertEqual(len(queries), 1)
+        version, registry = cache.get(groups.REGISTRY_KEY)
+        self.assertEqual(version, get_version(groups.REGISTRY_SCOPE))
+        self.assertEqual(set(registry), {'quiet', 'busy'})
+
+    def test_directory_answers_not_modified_until_change(self):
+        url = reverse('posts:group_index')
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(
+            author=GroupRegistryTests.user,
+            group=GroupRegistryTests.quiet,
+            text='Новый пост',
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,111 @@
+import random
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import LiveServerTestCase, SimpleTestCase, override_settings
+
+from .. import loadtest
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class LoadTestTests(LiveServerTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        author = User.objects.create_user(username='auth')
+        group = Group.objects.create(
+            title='Тестовая группа',
+            slug='uniqueslug',
+            description='Тестовое описание',
+        )
+        Post.objects.create(author=author, group=group, text='Тестовый пост')
+
+    def test_journeys_report_every_url(self):
+        """Все сценарии проходят без ошибок и попадают в отчёт"""
+        targets = loadtest.prepare(users=1)
+        report = loadtest.run(
+            self.live_server_url, targets, concurrency=1, duration=1.5
+        )
+        self.assertEqual(report['total']['errors'], 0)
+        self.assertLessEqual(
+            {'posts:index', 'posts:group_list', 'users:login'}, set(report)
+        )
+        for result in report.values():
+            self.assertGreater(result['rps'], 0)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+
+    def test_authenticated_journeys_write(self):
+        targets = loadtest.prepare(users=1)
+        loadtest.run(
+            self.live_server_url, targets, concurrency=1, duration=1,
+            journeys=('create', 'comment'),
+        )
+        [username] = targets.usernames
+        loader = User.objects.get(username=username)
+        self.assertTrue(Post.objects.filter(author=loader).exists())
+        self.assertTrue(Comment.objects.filter(author=loader).exists())
+        self.assertTrue(loader.follower.filter(author__username='auth'))
+
+        loadtest.cleanup(targets)
+        self.assertFalse(User.objects.filter(username=username).exists())
+        self.assertFalse(Post.objects.filter(author_id=loader.pk).exists())
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_each_run_gets_new_users_and_password(self):
+        first = loadtest.prepare(users=1)
+        second = loadtest.prepare(users=1)
+        self.assertNotEqual(first.usernames, second.usernames)
+        self.assertNotEqual(first.password, second.password)
+
+    def test_failed_login_is_an_error_not_a_session(self):
+        targets = loadtest.prepare(users=1)._replace(password='неверный')
+        report = loadtest.run(
+            self.live_server_url, targets, concurrency=1, duration=1,
+            journeys=('follow',),
+        )
+        self.assertGreater(report['users:login']['errors'], 0)
+        self.assertNotIn('posts:follow_index', report)
+
+    def test_browsing_stays_anonymous_after_login(self):
+        targets = loadtest.prepare(users=1)
+        user = loadtest.VirtualUser(
+            self.live_server_url, targets, targets.usernames[0],
+            lambda sample: None, random.Random(0),
+        )
+        user.login()
+        self.assertTrue(user.logged_in)
+        self.assertNotIn('sessionid', user.anonymous.cookies)
+        user.browse()
+        self.assertNotIn('sessionid', user.anonymous.cookies)
+
+    def test_command_requires_confirmation(self):
+        with self.assertRaises(CommandError):
+            call_command('loadtest', '--duration', '0')
+        self.assertFalse(
+            User.objects.filter(username__startswith='loadtest').exists()
+        )
+
+
+class SummarizeTests(SimpleTestCase):
+    def test_summarize_groups_by_url_name(self):
+        samples = [
+            loadtest.Sample('posts:index', 0.01, True),
+            loadtest.Sample('posts:index', 0.03, True),
+            loadtest.Sample('posts:follow_index', 0.02, False),
+        ]
+        report = loadtest.summarize(samples, elapsed=2)
+        self.assertEqual(report['posts:index']['requests'], 2)
+        self.assertEqual(report['posts:index']['rps'], 1)
+        self.assertEqual(report['posts:index']['p95_ms'], 30)
+        self.assertEqual(report['posts:follow_index']['errors'], 1)
+        self.assertEqual(report['total']['requests'], 3)
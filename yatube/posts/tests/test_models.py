@@ -1,7 +1,10 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 
-from ..models import Group, Post, Follow
+from ..models import Comment, Group, Post, Follow, UserStats
 
 User = get_user_model()
 
@@ -124,3 +127,110 @@ class PostModelTest(TestCase):
             },
             PostModelTest.following
         )
+
+
+class CountersModelTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='counters',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other',
+            description='Тестовое описание',
+        )
+
+    def assertCounters(self, user_posts, group_posts, comments, post):
+        stats = UserStats.objects.get(user=CountersModelTest.user)
+        self.assertEqual(stats.posts_count, user_posts)
+        self.assertEqual(
+            Group.objects.get(pk=CountersModelTest.group.pk).posts_count,
+            group_posts
+        )
+        self.assertEqual(
+            Post.objects.get(pk=post.pk).comments_count,
+            comments
+        )
+
+    def test_counters_follow_writes(self):
+        """Счётчики меняются вместе с постами, комментариями и подписками"""
+        post = Post.objects.create(
+            author=CountersModelTest.user,
+            text='Тестовый пост',
+            group=CountersModelTest.group,
+        )
+        comment = Comment.objects.create(
+            post=post,
+            author=CountersModelTest.reader,
+            text='Комментарий',
+        )
+        self.assertCounters(1, 1, 1, post)
+
+        comment.delete()
+        self.assertCounters(1, 1, 0, post)
+
+        post.group = CountersModelTest.other_group
+        post.save()
+        self.assertEqual(
+            Group.objects.get(pk=CountersModelTest.other_group.pk).posts_count,
+            1
+        )
+        self.assertCounters(1, 0, 0, post)
+
+        Follow.objects.create(
+            user=CountersModelTest.reader,
+            author=CountersModelTest.user
+        )
+        self.assertEqual(
+            UserStats.objects.get(user=CountersModelTest.user).followers_count,
+            1
+        )
+        self.assertEqual(
+            UserStats.objects.get(
+                user=CountersModelTest.reader
+            ).following_count,
+            1
+        )
+        Follow.objects.all().delete()
+        post.delete()
+        stats = UserStats.objects.get(user=CountersModelTest.user)
+        self.assertEqual(stats.followers_count, 0)
+        self.assertEqual(stats.posts_count, 0)
+
+    def test_save_keeps_counters(self):
+        """Сохранение устаревшего объекта не затирает счётчики"""
+        post = Post.objects.create(
+            author=CountersModelTest.user,
+            text='Тестовый пост',
+        )
+        Comment.objects.create(
+            post=post,
+            author=CountersModelTest.reader,
+            text='Комментарий',
+        )
+        post.text = 'Исправленный пост'
+        post.save()
+        self.assertEqual(Post.objects.get(pk=post.pk).comments_count, 1)
+
+    def test_recount_counters_command(self):
+        """Команда recount_counters чинит счётчики после bulk_create"""
+        Post.objects.bulk_create([
+            Post(
+                author=CountersModelTest.user,
+                text=f'Пост {i}',
+                group=CountersModelTest.group,
+            ) for i in range(2)
+        ])
+        post = Post.objects.filter(author=CountersModelTest.user).first()
+        Comment.objects.bulk_create([
+            Comment(post=post, author=CountersModelTest.reader, text='Ок')
+        ])
+        self.assertCounters(0, 0, 0, post)
+        call_command('recount_counters', stdout=StringIO())
+        self.assertCounters(2, 2, 1, post)
@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import groups
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class QueryPlanTests(TestCase):
+    """Запросы лент идут по индексам: без полного скана и сортировки."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='uniqueslug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        for i in range(15):
+            post = Post.objects.create(
+                author=cls.user,
+                group=cls.group,
+                text=f'Пост {i}',
+            )
+        Comment.objects.create(post=post, author=cls.reader, text='Текст')
+        cls.post = post
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(QueryPlanTests.reader)
+        cache.clear()
+        # Реестр групп — один полный скан маленькой таблицы на все
+        # страницы, а не запрос ленты.
+        groups.registry()
+
+    def assertIndexedPlans(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        with connection.cursor() as cursor:
+            for query in queries:
+                if not query['sql'].startswith('SELECT'):
+                    continue
+                cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                for step in (row[-1] for row in cursor.fetchall()):
+                    with self.subTest(url=url, sql=query['sql'], step=step):
+                        self.assertNotIn('TEMP B-TREE', step)
+                        if step.startswith('SCAN'):
+                            self.assertIn('USING', step)
+        return response
+
+    def test_feeds_use_indexes(self):
+        """Ленты и их вторые страницы читаются по индексам"""
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'uniqueslug'}),
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+            reverse('posts:follow_index'),
+        ]
+        for url in urls:
+            response = self.assertIndexedPlans(url)
+            next_cursor = response.context['page_obj'].next_cursor
+            self.assertIndexedPlans(f'{url}?cursor={next_cursor}')
+            self.assertIndexedPlans(f'{url}?page=2')
+
+    def test_post_detail_comments_use_index(self):
+        """Комментарии поста читаются по индексу (post, created)"""
+        self.assertIndexedPlans(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
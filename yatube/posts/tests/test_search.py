@@ -0,0 +1,132 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import search
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Сегодня выпал первый снег <b>тэг</b>',
+        )
+        cls.other = Post.objects.create(
+            author=cls.user,
+            text='Про дождь и лужи',
+        )
+        cls.comment = Comment.objects.create(
+            post=cls.other,
+            author=cls.user,
+            text='А у нас снегопад',
+        )
+
+    def setUp(self):
+        self.client = Client()
+
+    def search(self, query):
+        response = self.client.get(reverse('posts:search'), {'q': query})
+        return response, list(response.context['page_obj'])
+
+    def test_search_posts_and_comments_by_prefix(self):
+        """Находятся и посты, и комментарии, слова ищутся по префиксу"""
+        response, hits = self.search('снег')
+        self.assertEqual(response.context['page_obj'].paginator.count, 2)
+        found = {(hit.post.pk, getattr(hit.comment, 'pk', None))
+                 for hit in hits}
+        self.assertEqual(
+            found,
+            {(self.post.pk, None), (self.other.pk, self.comment.pk)}
+        )
+
+    def test_snippet_is_highlighted_and_escaped(self):
+        """Совпадение подсвечено, а HTML из текста экранирован"""
+        response, hits = self.search('первый')
+        self.assertEqual(len(hits), 1)
+        self.assertIn('<mark>первый</mark>', hits[0].snippet)
+        self.assertIn('&lt;b&gt;', hits[0].snippet)
+        self.assertNotContains(response, '<b>тэг</b>', html=False)
+
+    def test_index_follows_edit_and_delete(self):
+        """Индекс обновляется при изменении и удалении записей"""
+        other = Post.objects.get(pk=self.other.pk)
+        other.text = 'Про ливень'
+        other.save()
+        self.assertEqual(self.search('дождь')[1], [])
+        self.assertEqual(len(self.search('ливень')[1]), 1)
+        Comment.objects.get(pk=self.comment.pk).delete()
+        self.assertEqual(
+            [hit.post.pk for hit in self.search('снег')[1]], [self.post.pk]
+        )
+
+    def test_loaddata_is_indexed(self):
+        """Записи из фикстур попадают в индекс без rebuild"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = os.path.join(directory, 'posts.json')
+        with open(path, 'w', encoding='utf-8') as fixture:
+            json.dump([
+                {'model': 'posts.post', 'pk': 1000, 'fields': {
+                    'author': self.user.pk, 'text': 'Гололёд на дорогах',
+                    'created': '2026-01-01T00:00:00Z',
+                    'updated': '2026-01-01T00:00:00Z',
+                }},
+                {'model': 'posts.comment', 'pk': 1000, 'fields': {
+                    'post': 1000, 'author': self.user.pk,
+                    'text': 'Осторожно, сосульки',
+                    'created': '2026-01-01T00:00:00Z',
+                }},
+            ], fixture, ensure_ascii=False)
+        call_command('loaddata', path, verbosity=0)
+        self.assertEqual(
+            [hit.post.pk for hit in self.search('гололёд')[1]], [1000]
+        )
+        self.assertEqual(
+            [hit.comment.pk for hit in self.search('сосульки')[1]], [1000]
+        )
+
+    def test_syntax_in_query_is_not_an_error(self):
+        """Операторы FTS5 во вводе не ломают запрос"""
+        response, hits = self.search('снег" OR NEAR(')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(search.to_match('"a" OR b*'), '"a"* "or"* "b"*')
+
+    def test_pagination_keeps_query(self):
+        for number in range(12):
+            Post.objects.create(author=self.user, text=f'метель {number}')
+        response, hits = self.search('метель')
+        self.assertEqual(len(hits), 10)
+        self.assertContains(response, '?page=2&amp;q=%D0%BC')
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке находит записи через индекс"""
+        self.client.force_login(self.admin)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'снег'}
+        )
+        self.assertEqual(
+            [post.pk for post in response.context['cl'].result_list],
+            [self.post.pk]
+        )
+        response = self.client.get(
+            reverse('admin:posts_comment_changelist'), {'q': 'снег'}
+        )
+        self.assertEqual(
+            [comment.pk for comment in response.context['cl'].result_list],
+            [self.comment.pk]
+        )
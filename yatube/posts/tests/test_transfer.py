@@ -0,0 +1,129 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from .. import transfer
+from ..models import (
+    Comment, Follow, Group, ImportedPost, Post, TimelineEntry
+)
+
+User = get_user_model()
+
+
+class TransferTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='uniqueslug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        for i in range(7):
+            post = Post.objects.create(
+                author=cls.user,
+                group=cls.group if i % 2 else None,
+                text=f'Тестовый пост {i}',
+            )
+            Comment.objects.create(
+                post=post, author=cls.reader, text=f'Комментарий {i}'
+            )
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'dump.ndjson')
+        call_command('export_posts', output=self.path, stdout=StringIO())
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def snapshot(self):
+        return {
+            'posts': list(Post.objects.order_by('text').values_list(
+                'text', 'author__username', 'group__slug', 'created',
+                'comments_count',
+            )),
+            'comments': sorted(Comment.objects.values_list(
+                'post__text', 'author__username', 'text', 'created'
+            )),
+            'follows': sorted(Follow.objects.values_list(
+                'user__username', 'author__username'
+            )),
+        }
+
+    def wipe(self):
+        Post.objects.all().delete()
+        Follow.objects.all().delete()
+        Group.objects.all().delete()
+        User.objects.all().delete()
+
+    def test_export_streams_ndjson_in_load_order(self):
+        with open(self.path, encoding='utf-8') as dump:
+            models = [json.loads(line)['model'] for line in dump]
+        self.assertEqual(models, sorted(models, key=transfer.MODELS.index))
+        self.assertEqual(models.count('post'), 7)
+        self.assertEqual(models.count('comment'), 7)
+
+    def test_import_restores_exported_content(self):
+        before = self.snapshot()
+        self.wipe()
+        call_command('import_posts', self.path, stdout=StringIO())
+        self.assertEqual(self.snapshot(), before)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user__username='reader').count(), 7
+        )
+        self.assertFalse(os.path.exists(f'{self.path}.checkpoint'))
+
+    def test_import_resumes_from_checkpoint(self):
+        """Сбой посреди загрузки не теряет и не дублирует записи"""
+        before = self.snapshot()
+        self.wipe()
+        importer = transfer.Importer(self.path)
+        broken = mock.patch.object(
+            transfer.Importer, '_write_follows', side_effect=RuntimeError
+        )
+        with mock.patch.object(transfer, 'BATCH_SIZE', 4), broken:
+            with self.assertRaises(RuntimeError):
+                importer.run()
+        self.assertTrue(os.path.exists(importer.checkpoint))
+        self.assertEqual(Post.objects.count(), 7)
+
+        with mock.patch.object(transfer, 'BATCH_SIZE', 4):
+            transfer.Importer(self.path).run()
+        self.assertEqual(self.snapshot(), before)
+
+    def test_posts_created_during_import_keep_their_comments_apart(self):
+        """Посты сайта, созданные между пачками, не мешают загрузке"""
+        before = self.snapshot()
+        self.wipe()
+        flush = transfer.Importer._flush
+
+        def flush_and_post(importer):
+            flush(importer)
+            live = User.objects.get_or_create(username='live')[0]
+            Post.objects.create(author=live, text='Пост с сайта')
+
+        with mock.patch.object(transfer, 'BATCH_SIZE', 4), \
+                mock.patch.object(transfer.Importer, '_flush', flush_and_post):
+            transfer.Importer(self.path).run()
+        self.assertFalse(ImportedPost.objects.exists())
+        User.objects.filter(username='live').delete()
+        self.assertEqual(self.snapshot(), before)
+
+    def test_import_into_non_empty_database_keeps_existing_rows(self):
+        """Повторная загрузка дописывает посты, а не падает на ключах"""
+        call_command('import_posts', self.path, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 14)
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(Group.objects.count(), 1)
+        self.assertEqual(Follow.objects.count(), 1)
@@ -3,9 +3,13 @@ from django.test import Client, TestCase
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
 from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django import forms
 
-from ..models import Post, Group, Follow
+from .. import cards
+from ..models import Comment, Post, Group, Follow, TimelineEntry
+from ..utils import CNT_COMMENTS_IN_PAGE
 from itertools import islice
 
 User = get_user_model()
@@ -67,6 +71,33 @@ class PostsPagesTests(TestCase):
             len(response.context['page_obj'])
         )
 
+    def test_index_cache_invalidated_on_write(self):
+        """Новый, изменённый и удалённый пост сразу видны на главной"""
+        self.author_client.get(reverse('posts:index'))
+        new_post = Post.objects.create(
+            author=PostsPagesTests.user,
+            text='Пост после кэширования',
+        )
+        response = self.author_client.get(reverse('posts:index'))
+        self.assertEqual(response.context['page_obj'][0], new_post)
+
+        new_post.text = 'Исправленный пост'
+        new_post.save()
+        response = self.author_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Исправленный пост')
+
+        new_post.delete()
+        response = self.author_client.get(reverse('posts:index'))
+        self.assertNotContains(response, 'Исправленный пост')
+
+    def test_index_cache_survives_login(self):
+        """Вход пользователя не сбрасывает кэш главной страницы"""
+        self.author_client.get(reverse('posts:index'))
+        Post.objects.filter(pk=self.post.pk).update(text='Тихая правка')
+        Client().force_login(PostsPagesTests.reader)
+        response = self.author_client.get(reverse('posts:index'))
+        self.assertIsNone(response.context)
+
     def test_follow_template(self):
         response = self.reader_client.get(reverse('posts:follow_index'))
         self.assertEqual(len(response.context['page_obj']), 0)
@@ -77,6 +108,139 @@ class PostsPagesTests(TestCase):
         response = self.reader_client.get(reverse('posts:follow_index'))
         self.assertEqual(len(response.context['page_obj']), 1)
 
+    def test_follow_timeline_fan_out_and_prune(self):
+        """Лента подписок пополняется новыми постами и чистится отпиской"""
+        Follow.objects.create(
+            user=PostsPagesTests.reader,
+            author=PostsPagesTests.user
+        )
+        new_post = Post.objects.create(
+            author=PostsPagesTests.user,
+            text='Свежий пост',
+        )
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['page_obj'][0], new_post)
+        self.assertEqual(len(response.context['page_obj']), 2)
+
+        self.reader_client.get(
+            reverse('posts:profile_unfollow', kwargs={'username': 'auth'})
+        )
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=PostsPagesTests.reader).exists()
+        )
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        self.assertEqual(len(response.context['page_obj']), 0)
+
+    def test_profile_follow_button_in_one_query(self):
+        """Автор и состояние подписки в профиле читаются одним запросом"""
+        url = reverse('posts:profile', kwargs={'username': 'auth'})
+        response = self.reader_client.get(url)
+        self.assertFalse(response.context['author'].is_following)
+        self.assertContains(response, 'Подписаться')
+
+        Follow.objects.create(
+            user=PostsPagesTests.reader,
+            author=PostsPagesTests.user
+        )
+        response = self.reader_client.get(url)
+        self.assertTrue(response.context['author'].is_following)
+        self.assertContains(response, 'Отписаться')
+
+        with CaptureQueriesContext(connection) as queries:
+            self.reader_client.get(url)
+        author_queries = [
+            query for query in queries
+            if 'FROM "auth_user"' in query['sql']
+            and '"posts_follow"' in query['sql']
+        ]
+        self.assertEqual(len(author_queries), 1)
+
+        response = self.author_client.get(url)
+        self.assertTrue(response.context['is_self'])
+        self.assertNotContains(response, 'Подписаться')
+
+    def test_feed_follow_buttons_in_one_query(self):
+        """Подписка на авторов карточек ленты — в запросе самой ленты"""
+        others = [
+            User.objects.create_user(username=f'other{i}') for i in range(3)
+        ]
+        for other in others:
+            Post.objects.create(
+                author=other, group=PostsPagesTests.group, text='Пост'
+            )
+        Follow.objects.create(user=PostsPagesTests.reader, author=others[0])
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'uniqueslug'}),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.reader_client.get(url)
+                follow_queries = [
+                    query for query in queries
+                    if '"posts_follow"' in query['sql']
+                ]
+                self.assertEqual(len(follow_queries), 1)
+                state = {
+                    post.author: post.is_following
+                    for post in response.context['page_obj']
+                }
+                self.assertTrue(state[others[0]])
+                if url != reverse('posts:follow_index'):
+                    self.assertFalse(state[others[1]])
+                    self.assertContains(response, 'Подписаться')
+                self.assertContains(response, 'Отписаться')
+
+        Follow.objects.create(user=PostsPagesTests.reader, author=others[1])
+        response = self.reader_client.get(reverse('posts:index'))
+        self.assertContains(
+            response,
+            reverse('posts:profile_unfollow', args=[others[1].username])
+        )
+        response = self.author_client.get(reverse('posts:index'))
+        self.assertNotContains(
+            response,
+            reverse('posts:profile_follow', args=['auth'])
+        )
+
+    def test_post_detail_comments_are_paginated(self):
+        """Комментарии выводятся порциями и подгружаются фрагментом"""
+        Comment.objects.bulk_create(
+            Comment(
+                post=self.post,
+                author=PostsPagesTests.reader,
+                text=f'Комментарий {i}'
+            ) for i in range(CNT_COMMENTS_IN_PAGE + 5)
+        )
+        response = self.reader_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        comments = response.context['comments']
+        self.assertEqual(len(comments), CNT_COMMENTS_IN_PAGE)
+        self.assertEqual(
+            comments[0].text,
+            f'Комментарий {CNT_COMMENTS_IN_PAGE + 4}'
+        )
+        self.assertContains(response, 'Показать ещё')
+
+        response = self.reader_client.get(
+            reverse('posts:post_comments', kwargs={'post_id': self.post.pk}),
+            {'cursor': comments.next_cursor}
+        )
+        self.assertTemplateUsed(response, 'includes/comments.html')
+        self.assertTemplateNotUsed(response, 'base.html')
+        self.assertEqual(len(response.context['comments']), 5)
+        self.assertContains(response, 'Комментарий 0')
+        self.assertNotContains(response, 'Показать ещё')
+
+    def test_comments_of_missing_post_return_404(self):
+        url = reverse('posts:post_comments', kwargs={'post_id': 10 ** 6})
+        self.assertEqual(self.reader_client.get(url).status_code, 404)
+        url = reverse('posts:post_comments', kwargs={'post_id': self.post.pk})
+        self.assertEqual(self.reader_client.get(url).status_code, 200)
+
     def test_pages_uses_correct_template(self):
         """URL-адрес использует соответствующий шаблон."""
         templates_pages_names = {
@@ -252,3 +416,356 @@ class PaginatorViewsTest(TestCase):
             response.context['post'].group,
             PaginatorViewsTest.group
         )
+
+    def test_cursor_pages_walk_forward_and_back(self):
+        """Проверка перехода по курсорам вперёд и назад"""
+        paginator_info = PaginatorViewsTest.paginator_info
+        for reverse_name in paginator_info:
+            with self.subTest(reverse_name=reverse_name):
+                first_page = self.author_client.get(
+                    reverse_name
+                ).context['page_obj']
+                self.assertFalse(first_page.has_previous())
+                self.assertTrue(first_page.has_next())
+
+                second_page = self.author_client.get(
+                    reverse_name, {'cursor': first_page.next_cursor}
+                ).context['page_obj']
+                self.assertEqual(
+                    len(second_page),
+                    (
+                        PaginatorViewsTest.POSTS_NUM
+                        - PaginatorViewsTest.POSTS_PAGE_NUM
+                    )
+                )
+                self.assertFalse(second_page.has_next())
+                self.assertEqual(second_page[0].text, 'Пост4')
+
+                back_page = self.author_client.get(
+                    reverse_name, {'cursor': second_page.previous_cursor}
+                ).context['page_obj']
+                self.assertEqual(
+                    [post.pk for post in back_page],
+                    [post.pk for post in first_page]
+                )
+
+    def test_cursor_page_without_count_query(self):
+        """Курсорная страница не выполняет COUNT(*) по ленте"""
+        response = self.author_client.get(reverse('posts:index'))
+        next_cursor = response.context['page_obj'].next_cursor
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.author_client.get(
+                reverse('posts:index'), {'cursor': next_cursor}
+            )
+        self.assertFalse(
+            any('COUNT(' in query['sql'] for query in queries)
+        )
+
+    def test_cursor_page_inherited_members_do_not_crash(self):
+        """Унаследованные от Paginator и Page члены не падают"""
+        page = self.author_client.get(
+            reverse('posts:index')
+        ).context['page_obj']
+        paginator = page.paginator
+        self.assertIsNone(paginator.count)
+        self.assertEqual(list(paginator.page_range), [1, 2])
+        self.assertEqual(page.start_index(), 1)
+        self.assertEqual(page.end_index(), len(page))
+        self.assertEqual(list(paginator.get_page(5)), list(page))
+        self.assertEqual(list(paginator.page(2)), list(page))
+
+    def test_broken_cursor_returns_first_page(self):
+        """Битый курсор отдаёт первую страницу"""
+        response = self.author_client.get(
+            reverse('posts:index'), {'cursor': 'не-курсор'}
+        )
+        page_obj = response.context['page_obj']
+        self.assertFalse(page_obj.has_previous())
+        self.assertEqual(len(page_obj), PaginatorViewsTest.POSTS_PAGE_NUM)
+
+
+class QueryBudgetTests(TestCase):
+    """Число SQL-запросов каждой view не выходит за бюджет."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='uniqueslug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        for i in range(12):
+            cls.post = Post.objects.create(
+                author=cls.user,
+                group=cls.group,
+                text=f'Тестовый пост {i}',
+            )
+        Comment.objects.create(
+            post=cls.post,
+            author=cls.reader,
+            text='Тестовый комментарий',
+        )
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(QueryBudgetTests.user)
+        self.reader_client = Client()
+        self.reader_client.force_login(QueryBudgetTests.reader)
+        cache.clear()
+
+    def assertQueryBudget(self, budget, client, url, data=None):
+        method = client.post if data is not None else client.get
+        with CaptureQueriesContext(connection) as queries:
+            method(url, data)
+        self.assertLessEqual(
+            len(queries),
+            budget,
+            '\n'.join(query['sql'] for query in queries)
+        )
+
+    def test_read_views_query_budget(self):
+        """Чтение: сессия, пользователь и не больше двух запросов данных"""
+        post_id = QueryBudgetTests.post.pk
+        budgets = {
+            reverse('posts:index'): 3,
+            reverse('posts:group_list', kwargs={'slug': 'uniqueslug'}): 4,
+            reverse('posts:profile', kwargs={'username': 'auth'}): 4,
+            reverse('posts:post_detail', kwargs={'post_id': post_id}): 4,
+            reverse('posts:post_comments', kwargs={'post_id': post_id}): 1,
+            reverse('posts:follow_index'): 3,
+            reverse('posts:post_create'): 3,
+            reverse('posts:post_edit', kwargs={'post_id': post_id}): 4,
+        }
+        for url, budget in budgets.items():
+            with self.subTest(url=url):
+                self.assertQueryBudget(budget, self.author_client, url)
+
+    def test_write_views_query_budget(self):
+        """Запись: данные, лента, счётчики и поисковый индекс"""
+        post_id = QueryBudgetTests.post.pk
+        self.assertQueryBudget(
+            9, self.author_client,
+            reverse('posts:post_create'), {'text': 'Новый пост автора'}
+        )
+        self.assertQueryBudget(
+            9, self.author_client,
+            reverse('posts:post_edit', kwargs={'post_id': post_id}),
+            {'text': 'Исправленный пост', 'group': QueryBudgetTests.group.pk}
+        )
+        self.assertQueryBudget(
+            8, self.reader_client,
+            reverse('posts:add_comment', kwargs={'post_id': post_id}),
+            {'text': 'Новый комментарий'}
+        )
+        self.assertQueryBudget(
+            8, self.reader_client,
+            reverse('posts:profile_unfollow', kwargs={'username': 'auth'})
+        )
+        self.assertQueryBudget(
+            10, self.reader_client,
+            reverse('posts:profile_follow', kwargs={'username': 'auth'})
+        )
+
+
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='uniqueslug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            group=cls.group,
+            text='Тестовый пост',
+        )
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(PostCardCacheTests.user)
+        self.reader_client = Client()
+        self.reader_client.force_login(PostCardCacheTests.reader)
+        cache.clear()
+
+    def card(self):
+        post = Post.objects.select_related('author', 'group').get(
+            pk=PostCardCacheTests.post.pk
+        )
+        return cache.get(cards.card_key(post))
+
+    def get_group_page(self, client=None):
+        return (client or self.reader_client).get(
+            reverse('posts:group_list', kwargs={'slug': 'uniqueslug'})
+        )
+
+    def test_feed_reuses_cached_card(self):
+        """Повторный показ ленты берёт карточку из кэша"""
+        self.get_group_page()
+        self.assertIn('Тестовый пост', self.card())
+        key = cards.card_key(Post.objects.get(pk=PostCardCacheTests.post.pk))
+        cache.set(key, 'из кэша')
+        self.assertContains(self.get_group_page(), 'из кэша')
+
+    def test_edit_link_is_not_cached(self):
+        """Ссылка «изменить» зависит от читателя, а не от кэша"""
+        edit_url = reverse(
+            'posts:post_edit', kwargs={'post_id': PostCardCacheTests.post.pk}
+        )
+        self.assertNotContains(self.get_group_page(), edit_url)
+        self.assertContains(self.get_group_page(self.author_client), edit_url)
+        self.assertNotIn(edit_url, self.card())
+
+    def test_card_changes_with_post_group_and_author(self):
+        """Правка поста, группы или имени автора меняет карточку"""
+        self.get_group_page()
+        post = Post.objects.get(pk=PostCardCacheTests.post.pk)
+        post.text = 'Исправленный пост'
+        post.save()
+        self.assertContains(self.get_group_page(), 'Исправленный пост')
+
+        group = Group.objects.get(pk=PostCardCacheTests.group.pk)
+        group.title = 'Новое название'
+        group.save()
+        self.assertContains(self.get_group_page(), 'Все записи группы: Новое')
+
+        user = User.objects.get(pk=PostCardCacheTests.user.pk)
+        user.username = 'renamed'
+        user.save()
+        self.assertContains(self.get_group_page(), 'Все посты автора: renamed')
+
+    def test_new_comment_changes_card(self):
+        self.get_group_page()
+        Comment.objects.create(
+            post=PostCardCacheTests.post,
+            author=PostCardCacheTests.reader,
+            text='Комментарий',
+        )
+        self.assertContains(self.get_group_page(), '(комментариев: 1)')
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='uniqueslug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            group=cls.group,
+            text='Тестовый пост',
+        )
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(ConditionalGetTests.reader)
+        cache.clear()
+        self.urls = {
+            'index': reverse('posts:index'),
+            'group': reverse(
+                'posts:group_list', kwargs={'slug': 'uniqueslug'}
+            ),
+            'profile': reverse(
+                'posts:profile', kwargs={'username': 'auth'}
+            ),
+            'detail': reverse(
+                'posts:post_detail',
+                kwargs={'post_id': ConditionalGetTests.post.pk}
+            ),
+        }
+
+    def etags(self, client=None):
+        client = client or self.reader_client
+        return {
+            name: client.get(url)['ETag'] for name, url in self.urls.items()
+        }
+
+    def test_unchanged_pages_answer_not_modified_cheaply(self):
+        """Без изменений — 304 без запросов ленты и рендеринга"""
+        for name, etag in self.etags().items():
+            with self.subTest(page=name):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.reader_client.get(
+                        self.urls[name], HTTP_IF_NONE_MATCH=etag
+                    )
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+                # Сессия, пользователь и, кроме главной, сам объект.
+                self.assertLessEqual(len(queries), 3)
+
+    def test_comment_refreshes_cached_index(self):
+        """Новый комментарий меняет ETag и счётчик на главной"""
+        url = self.urls['index']
+        response = self.reader_client.get(url)
+        self.assertContains(response, 'комментариев: 0')
+        Comment.objects.create(
+            post=ConditionalGetTests.post,
+            author=ConditionalGetTests.reader,
+            text='Комментарий',
+        )
+        response = self.reader_client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'комментариев: 1')
+
+    def test_group_rename_changes_post_and_profile_etags(self):
+        """Новое название группы видно на странице поста и в профиле"""
+        before = self.etags()
+        group = Group.objects.get(pk=ConditionalGetTests.group.pk)
+        group.title = 'Новое название'
+        group.save()
+        for name in ('detail', 'profile'):
+            with self.subTest(page=name):
+                response = self.reader_client.get(
+                    self.urls[name], HTTP_IF_NONE_MATCH=before[name]
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Новое название')
+
+    def test_etag_depends_on_viewer(self):
+        author_client = Client()
+        author_client.force_login(ConditionalGetTests.user)
+        reader_etags = self.etags()
+        for name, etag in self.etags(author_client).items():
+            with self.subTest(page=name):
+                self.assertNotEqual(etag, reader_etags[name])
+
+    def test_changes_produce_new_etag(self):
+        """Комментарий, подписка и правка поста меняют ETag страниц"""
+        before = self.etags()
+        Comment.objects.create(
+            post=ConditionalGetTests.post,
+            author=ConditionalGetTests.reader,
+            text='Комментарий',
+        )
+        after_comment = self.etags()
+        for name in ('index', 'group', 'profile', 'detail'):
+            self.assertNotEqual(before[name], after_comment[name], name)
+
+        Follow.objects.create(
+            user=ConditionalGetTests.reader, author=ConditionalGetTests.user
+        )
+        after_follow = self.etags()
+        for name in ('index', 'group', 'profile'):
+            self.assertNotEqual(after_comment[name], after_follow[name], name)
+
+        post = Post.objects.get(pk=ConditionalGetTests.post.pk)
+        post.text = 'Исправленный пост'
+        post.save()
+        after_edit = self.etags()
+        for name in self.urls:
+            self.assertNotEqual(after_follow[name], after_edit[name], name)
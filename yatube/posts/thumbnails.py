@@ -0,0 +1,134 @@
+"""Предварительная генерация миниатюр картинок постов.
+
+Миниатюра строится не при первом показе поста, а сразу после загрузки
+картинки: декодирование, ресайз и кодирование выполняет задача
+``posts.tasks.build_thumbnail`` в воркере очереди (``jobs``), а готовый
+результат записывается в key-value хранилище sorl-thumbnail.
+Шаблоны только читают готовую миниатюру из хранилища и, пока её нет,
+показывают заглушку.
+"""
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+from core import profiling
+from core.cache import bump_version
+from jobs import queue
+from . import versions
+from .models import Post
+from .utils import INDEX_CACHE_SCOPE
+
+GEOMETRY: str = '960x339'
+OPTIONS: dict = {'crop': 'center', 'upscale': True}
+
+
+class PostThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl, который умеет не только строить, но и искать миниатюру.
+
+    Имя файла и опции вычисляются так же, как в ``get_thumbnail``,
+    поэтому результат совместим с тегом ``{% thumbnail %}``.
+    """
+
+    def prepare(self, source: ImageFile, storage, **options) -> tuple:
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, GEOMETRY, options)
+        return ImageFile(name, storage), options
+
+    def get_ready(self, file_) -> Optional[ImageFile]:
+        """Готовая миниатюра из хранилища или None, без генерации."""
+        thumbnail, _ = self.prepare(
+            ImageFile(file_), default.storage, **OPTIONS
+        )
+        return default.kvstore.get(thumbnail)
+
+    def render(self, source: ImageFile, storage) -> ImageFile:
+        thumbnail, options = self.prepare(source, storage, **OPTIONS)
+        source_image = default.engine.get_image(source)
+        try:
+            options['image_info'] = default.engine.get_image_info(
+                source_image
+            )
+            source.set_size(default.engine.get_image_size(source_image))
+            self._create_thumbnail(source_image, GEOMETRY, options, thumbnail)
+        finally:
+            default.engine.cleanup(source_image)
+        return thumbnail
+
+
+backend = PostThumbnailBackend()
+
+
+def get_ready_thumbnail(image) -> Optional[ImageFile]:
+    if not image:
+        return None
+    with profiling.section('thumbnails'):
+        return backend.get_ready(image)
+
+
+def _render(source_name: str, media_root: str, media_url: str) -> tuple:
+    """Только работа с картинкой, без базы и кэша."""
+    storage = FileSystemStorage(location=media_root, base_url=media_url)
+    source = ImageFile(source_name, storage)
+    thumbnail = backend.render(source, storage)
+    return source.name, source.size, thumbnail.name, thumbnail.size
+
+
+def _index(result: Tuple[str, list, str, list], post_id: int = None) -> None:
+    """Записывает готовую миниатюру в key-value хранилище sorl.
+
+    Заглушка в карточке поста и на закэшированной главной
+    меняется на картинку.
+    """
+    source_name, source_size, thumbnail_name, thumbnail_size = result
+    source = ImageFile(source_name)
+    source.set_size(source_size)
+    thumbnail = ImageFile(thumbnail_name, default.storage)
+    thumbnail.set_size(thumbnail_size)
+    default.kvstore.get_or_set(source)
+    default.kvstore.set(thumbnail, source)
+    if post_id is None:
+        return
+    Post.objects.filter(pk=post_id).update(updated=timezone.now())
+    bump_version(INDEX_CACHE_SCOPE)
+    row = Post.objects.filter(pk=post_id).values_list(
+        'author_id', 'group_id'
+    ).first()
+    if row is not None:
+        versions.bump_post(post_id, row[0], [row[1]])
+
+
+def _render_args(image_name: str) -> tuple:
+    return image_name, settings.MEDIA_ROOT, settings.MEDIA_URL
+
+
+def generate_now(image_name: str, post_id: int = None) -> None:
+    """Строит миниатюру синхронно в текущем процессе."""
+    with profiling.section('thumbnails'):
+        _index(_render(*_render_args(image_name)), post_id)
+
+
+def schedule(post) -> None:
+    """Ставит миниатюру картинки поста в очередь задач."""
+    if post.image:
+        image_name = post.image.name
+        # Ключ не даёт поставить одну картинку дважды, например
+        # при повторной отправке формы.
+        queue.enqueue(
+            'posts.tasks.build_thumbnail',
+            args=(image_name, post.pk),
+            key=f'thumbnail:{post.pk}:{image_name}',
+        )
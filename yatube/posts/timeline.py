@@ -0,0 +1,86 @@
+"""Лента подписок по схеме fan-out-on-write.
+
+Каждый новый пост раскладывается в ленты подписчиков автора, подписка
+докладывает в ленту посты автора, отписка их вычищает. Чтение ленты
+в ``follow_index`` становится одним диапазонным чтением по индексу
+(user, created).
+"""
+from typing import Iterable, Iterator
+
+from django.db import connection, transaction
+
+from .models import Follow, Post, TimelineEntry
+
+BATCH_SIZE: int = 500
+
+
+def _bulk_insert(entries: Iterable[TimelineEntry]) -> None:
+    batch = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) >= BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fan_out_post(post: Post) -> None:
+    """Кладёт пост в ленты всех подписчиков автора."""
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    _bulk_insert(
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post.pk,
+            author_id=post.author_id,
+            created=post.created,
+        )
+        for user_id in followers.iterator()
+    )
+
+
+def _author_entries(user_id: int, author_id: int) -> Iterator:
+    posts = Post.objects.filter(
+        author_id=author_id
+    ).values_list('pk', 'created')
+    for post_id, created in posts.iterator():
+        yield TimelineEntry(
+            user_id=user_id,
+            post_id=post_id,
+            author_id=author_id,
+            created=created,
+        )
+
+
+def backfill(user_id: int, author_id: int) -> None:
+    """Докладывает в ленту пользователя все посты нового автора."""
+    _bulk_insert(_author_entries(user_id, author_id))
+
+
+def prune(user_id: int, author_id: int) -> None:
+    """Убирает из ленты пользователя посты автора после отписки."""
+    TimelineEntry.objects.filter(
+        user_id=user_id,
+        author_id=author_id
+    ).delete()
+
+
+@transaction.atomic
+def rebuild() -> None:
+    """Пересобирает все ленты с нуля, например после bulk-загрузки.
+
+    Одним INSERT ... SELECT: у популярных авторов лент миллионы строк,
+    и создавать под каждую объект модели слишком дорого.
+    """
+    TimelineEntry.objects.all().delete()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {TimelineEntry._meta.db_table} '
+            f'(user_id, post_id, author_id, created) '
+            f'SELECT follow.user_id, post.id, post.author_id, post.created '
+            f'FROM {Follow._meta.db_table} follow '
+            f'JOIN {Post._meta.db_table} post '
+            f'ON post.author_id = follow.author_id'
+        )
@@ -1,15 +1,21 @@
 # posts/urls.py
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('groups/', views.group_index, name='group_index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path(
@@ -17,6 +23,23 @@ urlpatterns = [
         views.add_comment,
         name='add_comment'
     ),
+    path('search/', views.search, name='search'),
+    path('feed/rss/', feeds.posts_rss, name='feed_rss'),
+    path('feed/atom/', feeds.posts_atom, name='feed_atom'),
+    path('group/<slug:slug>/feed/rss/', feeds.group_rss, name='group_rss'),
+    path(
+        'group/<slug:slug>/feed/atom/', feeds.group_atom, name='group_atom'
+    ),
+    path(
+        'profile/<str:username>/feed/rss/',
+        feeds.author_rss,
+        name='author_rss'
+    ),
+    path(
+        'profile/<str:username>/feed/atom/',
+        feeds.author_atom,
+        name='author_atom'
+    ),
     path('follow/', views.follow_index, name='follow_index'),
     path(
         'profile/<str:username>/follow/',
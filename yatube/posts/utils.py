@@ -1,39 +1,141 @@
+from typing import Iterable, Optional, Set, Tuple
+
 from django.core.paginator import Paginator, Page
+from django.db.models import BooleanField, Exists, OuterRef, Value
 from django.db.models.query import QuerySet
 from django.core.handlers.wsgi import WSGIRequest
+from django.http import Http404
 from django.utils.functional import SimpleLazyObject
 from django.shortcuts import get_object_or_404
-from .models import User, Follow
+from . import groups
+from .models import Comment, Follow, Group, Post, User
+from .paginators import CursorPaginator
+from .search import SearchResults
 
 CNT_POSTS_IN_PAGE: int = 10
+CNT_COMMENTS_IN_PAGE: int = 20
+INDEX_CACHE_SCOPE: str = 'index_page'
+INDEX_CACHE_TIMEOUT: int = 60 * 60 * 6
+
+
+def get_page_obj(
+    data_list: QuerySet,
+    request: WSGIRequest,
+    keys: Tuple[str, str] = ('created', 'pk'),
+    follow_ref: Optional[str] = None,
+) -> Page:
+    """Страница ленты.
+
+    По умолчанию используется keyset-пагинация по курсору ``?cursor=``;
+    старые ссылки вида ``?page=N`` обслуживаются обычным Paginator.
+    С ``follow_ref`` строки страницы получают флаг ``is_following``
+    (см. ``with_follow_state``); COUNT(*) старых ссылок считается
+    без этого подзапроса.
+    """
+    page_number = request.GET.get('page')
+    if page_number is not None:
+        paginator = Paginator(data_list, CNT_POSTS_IN_PAGE)
+        page = paginator.get_page(page_number)
+        if follow_ref is not None:
+            page.object_list = with_follow_state(
+                page.object_list, request.user, follow_ref
+            )
+        return page
+    if follow_ref is not None:
+        data_list = with_follow_state(data_list, request.user, follow_ref)
+    paginator = CursorPaginator(data_list, CNT_POSTS_IN_PAGE, keys)
+    return paginator.get_cursor_page(request.GET.get('cursor'))
 
 
-def get_page_obj(data_list: QuerySet, request: WSGIRequest) -> Page:
-    paginator = Paginator(data_list, CNT_POSTS_IN_PAGE)
+def get_search_page(request: WSGIRequest, query: str) -> Page:
+    """Страница выдачи поиска, от самых релевантных результатов."""
+    paginator = Paginator(SearchResults(query), CNT_POSTS_IN_PAGE)
     return paginator.get_page(request.GET.get('page'))
 
 
-def is_can_add_subscribe(user: SimpleLazyObject, author_name: str) -> bool:
-    author = get_object_or_404(User, username=author_name)
-    if (
-        not Follow.objects.filter(
-            user=user,
-            author=author
-        ).exists()
-        and user.username != author.username
-    ):
-        return True
-    return False
+def get_post_or_404(request: WSGIRequest, post_id: int) -> Post:
+    """Пост вместе с автором и группой.
+
+    Загружается не больше одного раза за запрос: декораторы и сама
+    view получают один и тот же объект.
+    """
+    loaded = request.__dict__.setdefault('_loaded_posts', {})
+    if post_id not in loaded:
+        loaded[post_id] = get_object_or_404(
+            Post.objects.select_related('author__stats', 'group'),
+            pk=post_id
+        )
+    return loaded[post_id]
+
+
+def get_comments_page(post_id: int, cursor: Optional[str]) -> Page:
+    """Порция комментариев поста, от новых к старым, по курсору."""
+    comments = Comment.objects.filter(post_id=post_id).select_related(
+        'author'
+    )
+    paginator = CursorPaginator(comments, CNT_COMMENTS_IN_PAGE)
+    return paginator.get_cursor_page(cursor)
+
 
+def with_follow_state(
+    queryset: QuerySet,
+    viewer: SimpleLazyObject,
+    author_ref: str = 'pk',
+) -> QuerySet:
+    """Аннотирует queryset флагом is_following для текущего пользователя.
 
-def is_can_del_subscribe(user: SimpleLazyObject, author_name: str) -> bool:
-    author = get_object_or_404(User, username=author_name)
-    if (
+    Подписка проверяется подзапросом EXISTS в том же запросе, поэтому
+    годится и для одного автора, и для целой ленты: ``author_ref`` —
+    путь к автору от модели queryset ('pk' для User, 'author' для Post).
+    """
+    if viewer.is_anonymous:
+        return queryset.annotate(
+            is_following=Value(False, output_field=BooleanField())
+        )
+    return queryset.annotate(
+        is_following=Exists(
+            Follow.objects.filter(user=viewer, author=OuterRef(author_ref))
+        )
+    )
+
+
+def followed_author_ids(
+    viewer: SimpleLazyObject,
+    author_ids: Iterable[int],
+) -> Set[int]:
+    """Из переданных авторов возвращает тех, на кого подписан viewer."""
+    if viewer.is_anonymous:
+        return set()
+    return set(
         Follow.objects.filter(
-            user=user,
-            author=author
-        ).exists()
-        and user.username != author.username
-    ):
-        return True
-    return False
+            user=viewer,
+            author_id__in=author_ids
+        ).values_list('author_id', flat=True)
+    )
+
+
+def get_author_or_404(request: WSGIRequest, username: str) -> User:
+    """Автор со счётчиками и состоянием подписки одним запросом.
+
+    Как и пост, загружается не больше одного раза за запрос.
+    """
+    loaded = request.__dict__.setdefault('_loaded_authors', {})
+    if username not in loaded:
+        loaded[username] = get_object_or_404(
+            with_follow_state(
+                User.objects.select_related('stats'), request.user
+            ),
+            username=username
+        )
+    return loaded[username]
+
+
+def get_group_or_404(request: WSGIRequest, slug: str) -> Group:
+    """Группа по slug из реестра групп, без запроса к базе."""
+    loaded = request.__dict__.setdefault('_loaded_groups', {})
+    if slug not in loaded:
+        group = groups.get(slug)
+        if group is None:
+            raise Http404('Группа не найдена')
+        loaded[slug] = group
+    return loaded[slug]
@@ -0,0 +1,147 @@
+"""Версии содержимого страниц для условных GET-запросов.
+
+У каждого поста, автора и группы своя область версий в ``core.cache``.
+Сигналы поднимают её при любом изменении, которое видно на странице:
+правке поста, новом комментарии, подписке. Каталог групп живёт
+в области реестра групп (``posts.groups``). Кнопки подписки в лентах
+зависят ещё и от подписок читателя — их версия лежит в области
+``viewer``. ETag страницы состоит из версий её областей и id читателя,
+поэтому ответ ``304 Not Modified`` отдаётся до запросов ленты
+и рендеринга шаблона.
+"""
+from typing import Iterable, Optional, Tuple
+
+from django.core.cache import cache
+from django.core.handlers.wsgi import WSGIRequest
+
+from core.cache import VERSION_KEY, bump_version, get_version
+from .groups import REGISTRY_SCOPE
+from .models import Comment, Group, Post
+from .utils import (
+    INDEX_CACHE_SCOPE, get_author_or_404, get_group_or_404, get_post_or_404
+)
+
+
+def post_scope(post_id: int) -> str:
+    return f'post:{post_id}'
+
+
+def author_scope(user_id: int) -> str:
+    return f'author:{user_id}'
+
+
+def group_scope(group_id: int) -> str:
+    return f'group:{group_id}'
+
+
+def group_info_scope(group_id: int) -> str:
+    """Название и описание группы, без её ленты."""
+    return f'group_info:{group_id}'
+
+
+def viewer_scope(user_id: int) -> str:
+    return f'viewer:{user_id}'
+
+
+def bump_post(
+    post_id: int,
+    author_id: int,
+    group_ids: Iterable[Optional[int]] = (),
+) -> None:
+    """Пост виден на своей странице, в профиле автора и в группах."""
+    bump_version(
+        post_scope(post_id),
+        author_scope(author_id),
+        *(group_scope(group_id) for group_id in set(group_ids) if group_id),
+    )
+
+
+def bump_comment(comment: Comment) -> None:
+    """Комментарий меняет страницу поста и счётчик в карточках."""
+    if Comment.post.is_cached(comment):
+        post = comment.post
+        row = (post.author_id, post.group_id)
+    else:
+        # Пост мог быть удалён вместе с комментариями — тогда его
+        # области уже подняты сигналом удаления поста.
+        row = Post.objects.filter(pk=comment.post_id).values_list(
+            'author_id', 'group_id'
+        ).first()
+    if row is not None:
+        bump_post(comment.post_id, row[0], [row[1]])
+        # Счётчик комментариев есть и в карточках главной и API.
+        bump_version(INDEX_CACHE_SCOPE)
+
+
+def bump_group_info(group_id: int) -> None:
+    """Название группы есть на страницах её постов и в профилях авторов.
+
+    Страницы постов зависят от области ``group_info``, а профили
+    поднимаются по одному на каждого автора постов группы.
+    """
+    author_ids = Post.objects.filter(group_id=group_id).values_list(
+        'author_id', flat=True
+    ).distinct()
+    bump_version(
+        group_info_scope(group_id),
+        *(author_scope(author_id) for author_id in author_ids),
+    )
+
+
+def bump_all_groups() -> None:
+    bump_version(*(
+        group_scope(group_id)
+        for group_id in Group.objects.values_list('pk', flat=True)
+    ))
+
+
+def scope_versions(*scopes: str) -> str:
+    keys = [VERSION_KEY.format(scope=scope) for scope in scopes]
+    known = cache.get_many(keys)
+    return '-'.join(
+        str(known[key] if key in known else get_version(scope))
+        for key, scope in zip(keys, scopes)
+    )
+
+
+def _etag(request: WSGIRequest, *scopes: str) -> str:
+    return f'{scope_versions(*scopes)}-u{request.user.pk or 0}'
+
+
+def _viewer_scopes(request: WSGIRequest) -> Tuple[str, ...]:
+    if request.user.is_anonymous:
+        return ()
+    return (viewer_scope(request.user.pk),)
+
+
+def index_scopes(request: WSGIRequest) -> Tuple[str, ...]:
+    """Области кэша главной: общая лента и подписки читателя."""
+    return (INDEX_CACHE_SCOPE,) + _viewer_scopes(request)
+
+
+def index_etag(request: WSGIRequest) -> str:
+    return _etag(request, *index_scopes(request))
+
+
+def group_etag(request: WSGIRequest, slug: str) -> str:
+    group = get_group_or_404(request, slug)
+    return _etag(request, group_scope(group.pk), *_viewer_scopes(request))
+
+
+def groups_etag(request: WSGIRequest) -> str:
+    return _etag(request, REGISTRY_SCOPE)
+
+
+def profile_etag(request: WSGIRequest, username: str) -> str:
+    author = get_author_or_404(request, username)
+    return _etag(request, author_scope(author.pk))
+
+
+def post_etag(request: WSGIRequest, post_id: int) -> str:
+    # Пост всё равно нужен странице: get_post_or_404 отдаст его view
+    # без повторного запроса, а автор нужен для счётчика его постов.
+    post = get_post_or_404(request, post_id)
+    scopes = [post_scope(post.pk), author_scope(post.author_id)]
+    if post.group_id:
+        scopes.append(group_info_scope(post.group_id))
+    return _etag(request, *scopes)
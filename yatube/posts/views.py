@@ -1,63 +1,84 @@
+from urllib.parse import urlencode
+
 from django.contrib.auth.decorators import login_required
-from django.shortcuts import render, redirect, get_object_or_404
-from .models import Post, Group, User, Follow
+from django.http import Http404
+from django.shortcuts import render, redirect
+from django.views.decorators.http import condition
+from .models import Post, Follow
 from .forms import PostForm, CommentForm
-from .utils import get_page_obj, is_can_add_subscribe, is_can_del_subscribe
-from django.views.decorators.cache import cache_page
+from . import groups, thumbnails, versions
+from .utils import (
+    INDEX_CACHE_TIMEOUT,
+    get_author_or_404, get_comments_page, get_group_or_404, get_page_obj,
+    get_post_or_404, get_search_page
+)
+from core.cache import versioned_cache_page
 
 
 def belong_post_author(func):
     def wrapper(*args, **kwargs):
         request = args[0]
         post_id = kwargs['post_id']
-        if request.user == Post.objects.get(pk=post_id).author:
+        if request.user == get_post_or_404(request, post_id).author:
             return func(*args, **kwargs)
         else:
             return redirect('posts:post_detail', post_id)
     return wrapper
 
 
-@cache_page(60 * 20, key_prefix='index_page')
+@condition(etag_func=versions.index_etag)
+@versioned_cache_page(INDEX_CACHE_TIMEOUT, versions.index_scopes)
 def index(request):
     post_list = Post.objects.select_related('author', 'group')
-    page_obj = get_page_obj(post_list, request)
+    page_obj = get_page_obj(post_list, request, follow_ref='author')
 
     context = {
         'page_obj': page_obj,
+        'follow_buttons': True,
     }
     return render(request, 'posts/index.html', context)
 
 
+@condition(etag_func=versions.group_etag)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
+    group = get_group_or_404(request, slug)
     post_list = group.posts.select_related('group', 'author')
-    page_obj = get_page_obj(post_list, request)
+    page_obj = get_page_obj(post_list, request, follow_ref='author')
 
     context = {
         'group': group,
         'page_obj': page_obj,
+        'follow_buttons': True,
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@condition(etag_func=versions.groups_etag)
+def group_index(request):
+    context = {
+        'groups': groups.directory(),
+    }
+    return render(request, 'posts/groups.html', context)
+
+
+@condition(etag_func=versions.profile_etag)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_author_or_404(request, username)
     post_list = author.posts.select_related('group', 'author')
     page_obj = get_page_obj(post_list, request)
 
     context = {
         'page_obj': page_obj,
-        'author': author
+        'author': author,
+        'is_self': request.user == author,
     }
-    if not request.user.is_anonymous:
-        context['following'] = is_can_add_subscribe(request.user, username)
-        context['unfollowing'] = is_can_del_subscribe(request.user, username)
     return render(request, 'posts/profile.html', context)
 
 
+@condition(etag_func=versions.post_etag)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    comments = post.comments.select_related('author')
+    post = get_post_or_404(request, post_id)
+    comments = get_comments_page(post.pk, request.GET.get('cursor'))
     form = CommentForm()
     context = {
         'post': post,
@@ -67,6 +88,30 @@ def post_detail(request, post_id):
     return render(request, 'posts/post_detail.html', context)
 
 
+def post_comments(request, post_id):
+    """Следующая порция комментариев для подгрузки на странице поста."""
+    comments = get_comments_page(post_id, request.GET.get('cursor'))
+    # Пост проверяется, только если комментариев нет: у поста с ними
+    # порция по-прежнему стоит одного запроса.
+    if not comments and not Post.objects.filter(pk=post_id).exists():
+        raise Http404('Пост не найден')
+    context = {
+        'post_id': post_id,
+        'comments': comments,
+    }
+    return render(request, 'includes/comments.html', context)
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    context = {
+        'query': query,
+        'page_obj': get_search_page(request, query) if query else None,
+        'page_query': '&' + urlencode({'q': query}),
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def post_create(request):
     form = PostForm(
@@ -78,6 +123,7 @@ def post_create(request):
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        thumbnails.schedule(post)
         return redirect('posts:profile', request.user)
 
     context = {
@@ -89,7 +135,7 @@ def post_create(request):
 @login_required
 @belong_post_author
 def post_edit(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_post_or_404(request, post_id)
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
@@ -97,6 +143,8 @@ def post_edit(request, post_id):
     )
     if form.is_valid():
         form.save()
+        if 'image' in form.changed_data:
+            thumbnails.schedule(post)
         return redirect('posts:post_detail', post_id=post_id)
     context = {
         'post': post,
@@ -108,7 +156,7 @@ def post_edit(request, post_id):
 
 @login_required
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_post_or_404(request, post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
@@ -120,29 +168,35 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    page_obj = get_page_obj(post_list, request)
+    timeline = request.user.timeline.select_related(
+        'post__author',
+        'post__group'
+    )
+    page_obj = get_page_obj(
+        timeline, request, keys=('created', 'post_id'), follow_ref='author'
+    )
+    entries = page_obj.object_list
+    for entry in entries:
+        entry.post.is_following = entry.is_following
+    page_obj.object_list = [entry.post for entry in entries]
     context = {
         'page_obj': page_obj,
+        'follow_buttons': True,
     }
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
 def profile_follow(request, username):
-    if (is_can_add_subscribe(request.user, username)):
-        Follow.objects.create(
-            user=request.user,
-            author=get_object_or_404(User, username=username)
-        )
+    author = get_author_or_404(request, username)
+    if author != request.user and not author.is_following:
+        Follow.objects.create(user=request.user, author=author)
     return redirect('posts:profile', username)
 
 
 @login_required
 def profile_unfollow(request, username):
-    if (is_can_del_subscribe(request.user, username)):
-        Follow.objects.filter(
-            user=request.user,
-            author=get_object_or_404(User, username=username)
-        ).delete()
+    author = get_author_or_404(request, username)
+    if author.is_following:
+        Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('posts:profile', username)
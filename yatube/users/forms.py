@@ -1,6 +1,8 @@
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
 from django.contrib.auth import get_user_model
 
+from jobs import queue
+
 
 User = get_user_model()
 
@@ -13,3 +15,29 @@ class CreationForm(UserCreationForm):
         model = User
         # укажем, какие поля должны быть видны в форме и в каком порядке
         fields = ('first_name', 'last_name', 'username', 'email')
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """Письмо со ссылкой сброса пароля отправляет воркер очереди задач.
+
+    В очередь уходят только id пользователя, адрес и имена шаблонов:
+    токен и ссылку задача строит сама, чтобы они не лежали в таблице
+    задач.
+    """
+
+    def send_mail(self, subject_template_name, email_template_name,
+                  context, from_email, to_email,
+                  html_email_template_name=None):
+        queue.enqueue(
+            'users.tasks.send_password_reset',
+            args=(context['user'].pk, to_email),
+            kwargs={
+                'domain': context['domain'],
+                'site_name': context['site_name'],
+                'protocol': context['protocol'],
+                'subject_template_name': subject_template_name,
+                'email_template_name': email_template_name,
+                'html_email_template_name': html_email_template_name,
+                'from_email': from_email,
+            },
+        )
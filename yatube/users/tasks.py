@@ -0,0 +1,55 @@
+from typing import Optional
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.core.mail import send_mail
+from django.template import loader
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from jobs.queue import task
+
+User = get_user_model()
+
+
+@task(max_attempts=5)
+def send_password_reset(
+    user_id: int,
+    email: str,
+    domain: str,
+    site_name: str,
+    protocol: str,
+    subject_template_name: str,
+    email_template_name: str,
+    html_email_template_name: Optional[str] = None,
+    from_email: Optional[str] = None,
+) -> None:
+    """Письмо со ссылкой сброса пароля, как в ``PasswordResetForm``."""
+    # Пока задача ждала в очереди, пользователя могли отключить
+    # или сменить ему адрес — тогда письмо уже не нужно.
+    user = User.objects.filter(
+        pk=user_id, email__iexact=email, is_active=True
+    ).first()
+    if user is None:
+        return
+    context = {
+        'email': email,
+        'domain': domain,
+        'site_name': site_name,
+        'uid': urlsafe_base64_encode(force_bytes(user.pk)),
+        'user': user,
+        'token': default_token_generator.make_token(user),
+        'protocol': protocol,
+    }
+    subject = loader.render_to_string(subject_template_name, context)
+    # Заголовок письма не может содержать переводов строки.
+    subject = ''.join(subject.splitlines())
+    body = loader.render_to_string(email_template_name, context)
+    html_message = None
+    if html_email_template_name is not None:
+        html_message = loader.render_to_string(
+            html_email_template_name, context
+        )
+    send_mail(
+        subject, body, from_email, [email], html_message=html_message
+    )
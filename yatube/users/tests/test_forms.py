@@ -1,9 +1,15 @@
+import re
 import shutil
 import tempfile
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core import mail
 from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from jobs import queue
+from jobs.models import Job
 
 User = get_user_model()
 
@@ -41,3 +47,43 @@ class UserCreateFormTests(TestCase):
             ).exists()
         )
         self.assertIn
+
+    def test_password_reset_email_is_sent_by_worker(self):
+        """Письмо сброса пароля уходит из воркера очереди"""
+        User.objects.create_user(
+            username='forgetful',
+            email='forgetful@ya.ru',
+            password='old-password-123'
+        )
+        response = self.guest_client.post(
+            reverse('users:password_reset_form'),
+            {'email': 'forgetful@ya.ru'}
+        )
+        self.assertRedirects(response, reverse('users:password_reset_done'))
+        self.assertEqual(mail.outbox, [])
+
+        [job] = Job.objects.all()
+        self.assertNotIn('/auth/reset/', job.payload)
+        self.assertEqual(queue.run_pending(), 1)
+        [message] = mail.outbox
+        self.assertEqual(message.to, ['forgetful@ya.ru'])
+        self.assertIn('/auth/reset/', message.body)
+
+        # Ссылка из письма, собранная воркером, действительно сбрасывает
+        # пароль.
+        link = re.search(r'/auth/reset/\S+/', message.body).group()
+        response = self.guest_client.get(link, follow=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('new_password1', response.context['form'].fields)
+
+    def test_password_reset_skips_deactivated_user(self):
+        user = User.objects.create_user(
+            username='gone', email='gone@ya.ru', password='old-password-123'
+        )
+        self.guest_client.post(
+            reverse('users:password_reset_form'), {'email': 'gone@ya.ru'}
+        )
+        user.is_active = False
+        user.save()
+        self.assertEqual(queue.run_pending(), 1)
+        self.assertEqual(mail.outbox, [])
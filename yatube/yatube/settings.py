@@ -32,11 +32,42 @@ ALLOWED_HOSTS = [
     'testserver',
 ]
 
+# Общий для всех процессов хоста кэш в файле SQLite ('shared') и над ним
+# память процесса с коротким TTL ('default'): изменения из соседних
+# воркеров видны не позже чем через L1_TIMEOUT секунд. Для нескольких
+# серверов 'shared' заменяется на Memcached/Redis, 'default' не меняется.
 CACHES = {
     'default': {
+        'BACKEND': 'core.cache_backends.TwoTierCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {
+            'L1_TIMEOUT': 5,
+        },
+    },
+    'shared': {
+        'BACKEND': 'core.cache_backends.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
+    },
+}
+
+# Тесты и benchmark_views держат общий кэш в памяти процесса: их
+# cache.clear() не должен стирать рабочий cache.sqlite3, а данные прошлых
+# прогонов — попадать в новые. manage.py test подключает его через
+# TEST_RUNNER, pytest — через conftest.py в корне репозитория
+TEST_CACHES = {
+    'default': CACHES['default'],
+    'shared': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'LOCATION': 'shared',
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
+    },
 }
+TEST_RUNNER = 'core.testing.TestRunner'
 
 
 # Application definition
@@ -46,6 +77,7 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'jobs.apps.JobsConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -57,10 +89,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.ReplicaPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -90,12 +124,36 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# PRAGMA соединений (WAL и др.) выставляет core.db.configure_sqlite
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+        # Соединение переживает запрос: без переподключения и повторных
+        # PRAGMA на каждый запрос
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {
+            # Секунды ожидания чужой блокировки записи
+            'timeout': 5,
+        },
+    },
+    # Реплика только для чтения. Локально — копия db.sqlite3, которую
+    # обновляет manage.py sync_replica
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.replica.sqlite3'),
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {'timeout': 5},
+        'TEST': {'MIRROR': 'default'},
+    },
 }
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# Алиасы, с которых читают ленты; пустой список — всё из default.
+# Для локальной проверки: ['replica'] и периодический sync_replica
+DATABASE_REPLICAS = []
+# Сколько секунд после своей записи клиент читает из default: должно
+# быть больше отставания реплики
+REPLICA_PIN_SECONDS = 15
 
 
 # Password validation
@@ -140,6 +198,30 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Очередь отложенных задач (jobs): число процессов run_worker, пауза
+# опроса пустой очереди, аренда задачи воркером и первая пауза перед
+# повтором упавшей задачи (дальше удваивается), в секундах
+JOBS_WORKER_PROCESSES = 2
+JOBS_POLL_INTERVAL = 1.0
+JOBS_LEASE_SECONDS = 300
+JOBS_RETRY_DELAY = 10
+# Сколько секунд хранить выполненные и упавшие задачи; старые удаляет
+# run_worker
+JOBS_KEEP_FINISHED = 7 * 24 * 3600
+# Выполнять задачи в самом процессе сразу после коммита, без run_worker.
+# В разработке включено, в рабочей установке (DEBUG = False) задачи
+# выполняет только run_worker
+JOBS_EAGER = DEBUG
+
+# Профилирование запросов (core.middleware.ProfilingMiddleware):
+# доля профилируемых запросов и заголовок, которым сотрудник
+# включает профиль для своего запроса. Сводка — /debug/profile/
+PROFILING_SAMPLE_RATE = 0.0
+PROFILING_HEADER = 'X-Profile'
+PROFILING_LOG = os.path.join(BASE_DIR, 'profile.log')
+PROFILING_LOG_BYTES = 10 * 1024 * 1024
+PROFILING_LOG_BACKUPS = 3
+
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts:index'
@@ -18,12 +18,16 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from core.views import profile_summary
+
 urlpatterns = [
     path('', include('posts.urls', namespace='posts')),
+    path('api/', include('posts.api_urls', namespace='api')),
     path('admin/', admin.site.urls),
     path('auth/', include('users.urls', namespace='users')),
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include('about.urls', namespace='about')),
+    path('debug/profile/', profile_summary, name='profile_summary'),
 ]
 
 handler404 = 'core.views.page_not_found'